@@ -0,0 +1,58 @@
+"""
+Per-run topic catalog.
+Loads each vertical's topics once (or once per TTL) and keeps them current as topics are created.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from agent.db import fetch_topics_by_vertical
+from agent.models import TopicCatalogView
+
+
+# Reload a vertical after this many seconds in long-lived processes (the bot).
+TOPIC_CATALOG_TTL_SECONDS = float(os.getenv("TOPIC_CATALOG_TTL_SECONDS", "300"))
+
+
+class TopicCatalog:
+    """Thread-safe cache of TopicCatalogView per vertical."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = TOPIC_CATALOG_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._views: Dict[str, Tuple[TopicCatalogView, float]] = {}
+        self._lock = threading.Lock()
+
+    def view(self, vertical: str) -> TopicCatalogView:
+        """Return the cached view for a vertical, loading it if missing or stale."""
+        with self._lock:
+            cached = self._views.get(vertical)
+            if cached and time.monotonic() - cached[1] < self.ttl_seconds:
+                return cached[0]
+
+            # Loading under the lock means concurrent workers share one fetch
+            view = TopicCatalogView.build(vertical, fetch_topics_by_vertical(vertical))
+            self._views[vertical] = (view, time.monotonic())
+            return view
+
+    def add_topic(self, topic_id: str, topic_name: str, vertical: str) -> None:
+        """Update a loaded vertical in place after a topic is created."""
+        with self._lock:
+            cached = self._views.get(vertical)
+            if cached is None:
+                return
+
+            view, loaded_at = cached
+            topics = list(view.topics) + [{"id": topic_id, "name": topic_name}]
+            self._views[vertical] = (TopicCatalogView.build(vertical, topics), loaded_at)
+
+    def invalidate(self, vertical: Optional[str] = None) -> None:
+        """Drop one vertical (or all) so the next view() reloads it."""
+        with self._lock:
+            if vertical is None:
+                self._views.clear()
+            else:
+                self._views.pop(vertical, None)
+
+
+topic_catalog = TopicCatalog()
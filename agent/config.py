@@ -1,15 +1,86 @@
+"""
+Environment config and client providers.
+Clients are built on first use, so importing the agent (or running with the
+SQLite backend, a dry run, or a single vertical) does not pay for clients
+it never touches. Each provider can be overridden, e.g. with a fake model.
+"""
 import os
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from supabase import create_client
 
 load_dotenv(dotenv_path=".env")
 
-model = ChatGroq(
-    model_name="meta-llama/llama-4-scout-17b-16e-instruct"
-)
+T = TypeVar("T")
+
+
+class LazyClient(Generic[T]):
+    """
+    Thread-safe, lazily built client.
+
+    Attribute access is forwarded to the client, so a provider can be used
+    in place of the client itself (`model.invoke(...)`). override() swaps in
+    another instance; reset() drops it so the next use builds a fresh one.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def override(self, instance: T) -> None:
+        with self._lock:
+            self._instance = instance
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instance = None
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+def _build_model():
+    from langchain_groq import ChatGroq
+
+    from agent.llm import LLMGateway
+    from agent.llm_cache import CachedModel
+
+    # Retries are handled by the gateway, so the provider client must not retry too.
+    # Cache hits are served before the gateway and don't count against rate limits.
+    return CachedModel(
+        LLMGateway(
+            ChatGroq(
+                model_name="meta-llama/llama-4-scout-17b-16e-instruct",
+                max_retries=0,
+            ),
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30")),
+            tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "30000")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+        )
+    )
+
+
+def _build_supabase():
+    from supabase import create_client
+
+    return create_client(
+        os.environ["SUPABASE_URL"],
+        os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+    )
+
 
-supabase = create_client(
-    os.environ["SUPABASE_URL"],
-    os.environ["SUPABASE_SERVICE_ROLE_KEY"]
-)
+# Both clients are shared by the parallel dispatch workers. Each wraps a
+# synchronous httpx.Client, which is safe to use from multiple threads.
+model = LazyClient(_build_model)
+supabase = LazyClient(_build_supabase)
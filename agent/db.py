@@ -1,14 +1,27 @@
 """
 Database operations for the agent.
-All Supabase interactions are centralized here.
+All persistence goes through here; the backend (Supabase or SQLite) is chosen in agent/storage.py.
 """
-from typing import Optional, List, Dict, TYPE_CHECKING
-from datetime import datetime, timezone
+import os
+from typing import Optional, List, Dict, Iterable, Set, TYPE_CHECKING
+from datetime import datetime, timezone, timedelta
 
-from agent.config import supabase
+from agent.metrics import metrics
+from agent.storage import get_storage
 
 if TYPE_CHECKING:
-    from agent.models import TopicMemory, MemoryUpdateProposal
+    from agent.models import TopicMemory, MemoryUpdateProposal, IngestionOutcome
+
+
+# =============================================================================
+# BACKEND CALLS
+# =============================================================================
+
+def _db(op: str, *args, **kwargs):
+    """Call one storage backend method, counted and timed as a DB round trip."""
+    metrics.incr("db_calls", op=op)
+    with metrics.span(f"db.{op}"):
+        return getattr(get_storage(), op)(*args, **kwargs)
 
 
 # =============================================================================
@@ -28,61 +41,106 @@ SECTION_TO_COLUMN = {
 # DEDUPLICATION
 # =============================================================================
 
+# Sources known to be seen during this process (accepted, rejected or dispatched).
+_seen_sources: Set[str] = set()
+
+# Re-evaluate ledger entries older than this many days. Unset = never.
+_ttl = os.getenv("PROCESSED_SOURCE_TTL_DAYS")
+PROCESSED_SOURCE_TTL_DAYS: Optional[float] = float(_ttl) if _ttl else None
+
+
 def has_seen_source(source_link: str) -> bool:
-    """Returns True if source_link has already been processed (accepted or rejected)."""
-    accepted = (
-        supabase
-        .table("accepted_proposals")
-        .select("id")
-        .eq("source_link", source_link)
-        .limit(1)
-        .execute()
-    )
-    if accepted.data:
-        return True
-
-    rejected = (
-        supabase
-        .table("rejected_proposals")
-        .select("id")
-        .eq("source_link", source_link)
-        .limit(1)
-        .execute()
+    """Returns True if source_link has already been processed (ledger, accepted or rejected)."""
+    return source_link in fetch_seen_sources([source_link])
+
+
+def fetch_seen_sources(source_links: Iterable[str]) -> Set[str]:
+    """
+    Bulk variant of has_seen_source.
+    Returns the subset of source_links already processed: recorded in the
+    processed_sources ledger (within the TTL), accepted or rejected. Links
+    already known to this process are not looked up again.
+    """
+    links = {link for link in source_links if link}
+    seen = links & _seen_sources
+    remaining = list(links - seen)
+
+    cutoff = None
+    if PROCESSED_SOURCE_TTL_DAYS is not None:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=PROCESSED_SOURCE_TTL_DAYS)).isoformat()
+
+    if remaining:
+        seen |= _db("fetch_seen_sources", remaining, processed_since=cutoff)
+
+    _seen_sources.update(seen)
+    return seen
+
+
+def mark_source_seen(source_link: str) -> None:
+    """Remember a source as handled for the rest of this process."""
+    _seen_sources.add(source_link)
+
+
+def forget_source(source_link: str) -> None:
+    """Undo mark_source_seen, e.g. after ingestion failed, so the source is retried."""
+    _seen_sources.discard(source_link)
+
+
+# =============================================================================
+# PROCESSED SOURCES LEDGER
+# =============================================================================
+
+def record_processed_source(source_link: str, outcome: "IngestionOutcome") -> None:
+    """
+    Record the terminal outcome of ingesting a source, so no-op articles
+    (no new topic, no update, format failures) are not re-sent to the LLM.
+    """
+    _db(
+        "upsert_processed_source",
+        source_link,
+        outcome=outcome.value,
+        processed_at=datetime.now(timezone.utc).isoformat(),
     )
-    return bool(rejected.data)
 
 
 # =============================================================================
 # PENDING PROPOSALS
 # =============================================================================
 
-def log_pending_proposal(proposal) -> None:
-    payload = proposal.to_log_payload()
-    supabase.table("pending_proposals").insert(payload).execute()
+def log_pending_proposal(proposal) -> Optional[str]:
+    """Insert a pending proposal and return its id from the inserted row."""
+    rows = _db("insert_pending_proposals", [proposal.to_log_payload()])
+    return rows[0]["id"] if rows else None
 
 
-def get_pending_id_for_proposal(proposal) -> str | None:
-    """Find the pending_id for a just-logged proposal by its source_link."""
-    rows = fetch_pending_proposals()
-    return next(
-        (row["id"] for row in rows if row["source_link"] == proposal.source_link),
-        None
-    )
+def log_pending_proposals(proposals: List) -> List[Optional[str]]:
+    """Bulk insert pending proposals; returns their ids in input order."""
+    if not proposals:
+        return []
+
+    rows = _db("insert_pending_proposals", [p.to_log_payload() for p in proposals])
+
+    if len(rows) != len(proposals):
+        return [None] * len(proposals)
+    return [row["id"] for row in rows]
 
 
 def fetch_pending_proposals() -> List[Dict]:
-    res = (
-        supabase
-        .table("pending_proposals")
-        .select("*")
-        .order("created_at")
-        .execute()
-    )
-    return res.data or []
+    return _db("fetch_pending_proposals")
+
+
+def fetch_pending_proposal(pending_id: str) -> Optional[Dict]:
+    """Fetch a single pending proposal by primary key."""
+    return _db("fetch_pending_proposal", pending_id)
 
 
 def delete_pending_proposal(pending_id: str) -> None:
-    supabase.table("pending_proposals").delete().eq("id", pending_id).execute()
+    _db("delete_pending_proposal", pending_id)
+
+
+def delete_pending_proposals(pending_ids: List[str]) -> None:
+    if pending_ids:
+        _db("delete_pending_proposals", list(pending_ids))
 
 
 # =============================================================================
@@ -90,11 +148,16 @@ def delete_pending_proposal(pending_id: str) -> None:
 # =============================================================================
 
 def log_accepted_proposal(proposal) -> None:
-    payload = proposal.to_log_payload()
-    supabase.table("accepted_proposals").insert(payload).execute()
+    _db("insert_accepted_proposal", proposal.to_log_payload())
 
 
-def log_rejected_proposal(proposal, rejection_reason: str) -> None:
+def log_accepted_proposals(proposals: List) -> None:
+    """Bulk insert accepted proposals in one write."""
+    if proposals:
+        _db("insert_accepted_proposals", [p.to_log_payload() for p in proposals])
+
+
+def _rejected_payload(proposal, rejection_reason: str) -> Dict:
     base_payload = proposal.to_log_payload()
 
     payload = {
@@ -106,9 +169,17 @@ def log_rejected_proposal(proposal, rejection_reason: str) -> None:
         "source_link": base_payload.get("source_link"),
         "rejection_reason": rejection_reason,
     }
-    payload = {k: v for k, v in payload.items() if v is not None}
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+def log_rejected_proposal(proposal, rejection_reason: str) -> None:
+    _db("insert_rejected_proposal", _rejected_payload(proposal, rejection_reason))
 
-    supabase.table("rejected_proposals").insert(payload).execute()
+
+def log_rejected_proposals(proposals: List, rejection_reason: str) -> None:
+    """Bulk insert rejected proposals sharing one reason in one write."""
+    if proposals:
+        _db("insert_rejected_proposals", [_rejected_payload(p, rejection_reason) for p in proposals])
 
 
 # =============================================================================
@@ -116,49 +187,67 @@ def log_rejected_proposal(proposal, rejection_reason: str) -> None:
 # =============================================================================
 
 def fetch_topics_by_vertical(vertical: str) -> List[Dict]:
-    response = (
-        supabase
-        .table("topics")
-        .select("id, name")
-        .eq("vertical", vertical)
-        .execute()
-    )
-    if response.data is None:
-        return []
-    return response.data
+    return _db("fetch_topics_by_vertical", vertical)
+
+
+def fetch_topic_verticals(topic_ids: Iterable[str]) -> Dict[str, str]:
+    """{topic_id: vertical} for the given topics, in one batched lookup."""
+    topic_ids = list(dict.fromkeys(topic_ids))
+    if not topic_ids:
+        return {}
+    return _db("fetch_topic_verticals", topic_ids)
 
 
 def create_topic(topic_id: str, topic_name: str, vertical: str) -> str:
-    supabase.table("topics").insert({
-        "id": topic_id,
-        "name": topic_name,
-        "vertical": vertical
-    }).execute()
+    _db("insert_topic", topic_id, topic_name, vertical)
 
     initialize_topic_memory(topic_id)
+
+    from agent.catalog import topic_catalog
+    from agent.topic_index import topic_index
+    topic_catalog.add_topic(topic_id, topic_name, vertical)
+    topic_index.add_topic(topic_id, topic_name, vertical)
+
     return topic_id
 
 
+def create_topics(topics: List[Dict]) -> None:
+    """
+    Bulk create [{"id", "name", "vertical"}] topics with initial memory:
+    two writes in total instead of two per topic.
+    """
+    if not topics:
+        return
+
+    _db("insert_topics", topics)
+    _db("insert_topic_memories", [_initial_topic_memory_row(t["id"]) for t in topics])
+
+    from agent.catalog import topic_catalog
+    from agent.topic_index import topic_index
+    for topic in topics:
+        topic_catalog.add_topic(topic["id"], topic["name"], topic["vertical"])
+        topic_index.add_topic(topic["id"], topic["name"], topic["vertical"])
+
+
 # =============================================================================
 # TOPIC MEMORY
 # =============================================================================
 
-def load_topic_memory(topic_id: str) -> Optional["TopicMemory"]:
-    from agent.models import TopicMemory
+# Only the belief columns; progress history lives in topic_progress_history
+TOPIC_MEMORY_COLUMNS = ["topic_id", *SECTION_TO_COLUMN.values(), "last_updated_ts"]
 
-    response = (
-        supabase
-        .table("topic_memory")
-        .select("*")
-        .eq("topic_id", topic_id)
-        .maybe_single()
-        .execute()
-    )
 
-    if response is None or response.data is None:
+def load_topic_memory(topic_id: str, include_history: bool = False) -> Optional["TopicMemory"]:
+    """
+    Load a topic's belief sections.
+    Progress history is only fetched (first page) when include_history is set.
+    """
+    from agent.models import TopicMemory
+
+    data = _db("fetch_topic_memory", topic_id, TOPIC_MEMORY_COLUMNS)
+    if data is None:
         return None
 
-    data = response.data
     return TopicMemory(
         topic_id=data["topic_id"],
         topic_name=None,
@@ -167,48 +256,141 @@ def load_topic_memory(topic_id: str) -> Optional["TopicMemory"]:
         enabling_conditions=data["enabling_conditions"],
         problems_solved=data["problems_solved"],
         operational_understanding=data["operational_understanding"],
-        progress_history=data.get("progress_history") or [],
+        progress_history=fetch_progress_history(topic_id) if include_history else [],
         last_updated_ts=data.get("last_updated_ts"),
     )
 
 
-def initialize_topic_memory(topic_id: str) -> None:
-    base_row = {
+def fetch_topic_memory_texts(topic_ids: List[str]) -> Dict[str, str]:
+    """Concatenated section text per topic, for the local topic index."""
+    columns = list(SECTION_TO_COLUMN.values())
+    rows = _db("fetch_topic_memories", topic_ids, ["topic_id"] + columns)
+    return {
+        row["topic_id"]: "\n".join(row.get(c) or "" for c in columns)
+        for row in rows
+    }
+
+
+def _initial_topic_memory_row(topic_id: str) -> Dict:
+    return {
         "topic_id": topic_id,
         "predecessors_limitations": "Not yet researched",
         "core_proposal": "Not yet researched",
         "enabling_conditions": "Not yet researched",
         "problems_solved": "Not yet researched",
         "operational_understanding": "Not yet researched",
-        "progress_history": [],
         "last_updated_ts": datetime.now(timezone.utc).isoformat(),
     }
-    supabase.table("topic_memory").insert(base_row).execute()
+
+
+def initialize_topic_memory(topic_id: str) -> None:
+    _db("insert_topic_memory", _initial_topic_memory_row(topic_id))
 
 
 def apply_memory_update_to_db(topic_id: str, proposed_update: "MemoryUpdateProposal") -> None:
+    """
+    Overwrite one section and append a progress entry.
+    Both are single writes; there is no read-modify-write of the history.
+    """
     column = SECTION_TO_COLUMN.get(proposed_update.schema_section.value)
     if not column:
         raise ValueError("Invalid schema section")
 
-    existing_memory = load_topic_memory(topic_id)
-    if not existing_memory:
+    now = datetime.now(timezone.utc).isoformat()
+
+    row = _db(
+        "update_topic_memory",
+        topic_id,
+        {column: proposed_update.new_belief, "last_updated_ts": now},
+    )
+
+    if row is None:
         raise ValueError("No Topic exists")
 
-    new_entry = {
-        "section": proposed_update.schema_section.value,
-        "source": proposed_update.source_link,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    }
-    updated_progress = existing_memory.progress_history + [new_entry]
+    append_progress_entry(
+        topic_id,
+        section=proposed_update.schema_section.value,
+        source=proposed_update.source_link,
+        timestamp=now,
+    )
+
+    from agent.topic_index import topic_index
+    topic_index.update_topic_memory(
+        topic_id,
+        "\n".join(row.get(c) or "" for c in SECTION_TO_COLUMN.values()),
+    )
+
+
+def apply_memory_updates_to_db(proposed_updates: List["MemoryUpdateProposal"]) -> Set[str]:
+    """
+    Overwrite the sections of several updates with one write per topic;
+    returns the ids of topics whose write failed. Later updates to the same
+    section win. Progress entries are left to append_progress_entries().
+    """
+    values: Dict[str, Dict[str, str]] = {}
+    for proposed_update in proposed_updates:
+        column = SECTION_TO_COLUMN.get(proposed_update.schema_section.value)
+        if not column:
+            raise ValueError("Invalid schema section")
+        values.setdefault(proposed_update.topic_id, {})[column] = proposed_update.new_belief
+
+    from agent.topic_index import topic_index
+
+    now = datetime.now(timezone.utc).isoformat()
+    failed: Set[str] = set()
+    for topic_id, columns in values.items():
+        try:
+            row = _db("update_topic_memory", topic_id, {**columns, "last_updated_ts": now})
+            if row is None:
+                raise ValueError("No Topic exists")
+        except Exception as e:
+            print(f"[DB] Failed to update memory of {topic_id}: {e}")
+            failed.add(topic_id)
+            continue
+
+        topic_index.update_topic_memory(
+            topic_id,
+            "\n".join(row.get(c) or "" for c in SECTION_TO_COLUMN.values()),
+        )
+
+    return failed
 
-    update_payload = {
-        column: proposed_update.new_belief,
-        "progress_history": updated_progress,
-        "last_updated_ts": datetime.now(timezone.utc).isoformat(),
-    }
 
-    supabase.table("topic_memory") \
-        .update(update_payload) \
-        .eq("topic_id", topic_id) \
-        .execute()
+# =============================================================================
+# PROGRESS HISTORY
+# =============================================================================
+
+def append_progress_entry(topic_id: str, section: str, source: str, timestamp: str) -> None:
+    """Append one entry to a topic's progress history (a single insert)."""
+    _db("insert_progress_entry", {
+        "topic_id": topic_id,
+        "section": section,
+        "source": source,
+        "created_at": timestamp,
+    })
+
+
+def append_progress_entries(proposed_updates: List["MemoryUpdateProposal"]) -> None:
+    """Append one progress entry per applied update, in a single insert."""
+    now = datetime.now(timezone.utc).isoformat()
+    _db("insert_progress_entries", [
+        {
+            "topic_id": proposed_update.topic_id,
+            "section": proposed_update.schema_section.value,
+            "source": proposed_update.source_link,
+            "created_at": now,
+        }
+        for proposed_update in proposed_updates
+    ])
+
+
+def fetch_progress_history(topic_id: str, limit: int = 50, offset: int = 0) -> List[Dict]:
+    """
+    One page of a topic's progress history, newest first.
+    Entries have the same shape as the old progress_history list items.
+    """
+    rows = _db("fetch_progress_history", topic_id, limit, offset)
+    return [
+        {"section": row["section"], "source": row["source"], "timestamp": row["created_at"]}
+        for row in rows
+    ]
@@ -0,0 +1,243 @@
+"""
+Near-duplicate detection for discovery items.
+Collapses the same story published under different URLs (Techmeme, HN, vendor blog, ...)
+using canonical URLs and MinHash signatures with LSH banding.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+from array import array
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from agent.discovery.sources.feed_cache import FEED_CACHE_DIR
+from agent.metrics import metrics
+
+
+# =============================================================================
+# SETTINGS
+# =============================================================================
+
+NUM_PERMUTATIONS = 64                # power of two: bins are picked by bit mask
+LSH_BANDS = 16                      # 16 bands x 4 rows ~ 0.5 Jaccard candidate threshold
+SHINGLE_SIZE = 3
+
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+DEDUP_WINDOW_DAYS = float(os.getenv("DEDUP_WINDOW_DAYS", "7"))
+
+# One-permutation MinHash: the low bits of each 64-bit shingle hash pick a
+# bin, the remaining bits are the value. One pass per document instead of
+# NUM_PERMUTATIONS passes; empty bins are filled by rotation densification.
+_BIN_BITS = (NUM_PERMUTATIONS - 1).bit_length()
+_BIN_MASK = NUM_PERMUTATIONS - 1
+_ROTATION_OFFSET = 1 << (64 - _BIN_BITS)
+
+_TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "mc_cid", "mc_eid", "ref", "ref_src",
+    "igshid", "yclid", "_hsenc", "_hsmi", "mkt_tok",
+}
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+")
+
+
+# =============================================================================
+# CANONICAL URLS
+# =============================================================================
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a link so trivially different URLs compare equal:
+    lowercase host, no www., no fragment, no tracking params, sorted query,
+    no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/") or ""
+
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+# =============================================================================
+# MINHASH
+# =============================================================================
+
+def _shingles(text: str) -> Set[int]:
+    words = _WORD_RE.findall(_TAG_RE.sub(" ", text).lower())
+    if len(words) < SHINGLE_SIZE:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [
+            " ".join(words[i:i + SHINGLE_SIZE])
+            for i in range(len(words) - SHINGLE_SIZE + 1)
+        ]
+
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "big")
+        for g in grams
+    }
+
+
+def minhash_signature(text: str) -> Optional[Tuple[int, ...]]:
+    """MinHash signature of word shingles, or None for empty text."""
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+
+    bins: List[Optional[int]] = [None] * NUM_PERMUTATIONS
+    for h in shingles:
+        b = h & _BIN_MASK
+        v = h >> _BIN_BITS
+        if bins[b] is None or v < bins[b]:
+            bins[b] = v
+
+    signature = []
+    for i in range(NUM_PERMUTATIONS):
+        j, distance = i, 0
+        while bins[j] is None:
+            j = (j + 1) % NUM_PERMUTATIONS
+            distance += 1
+        signature.append(bins[j] + distance * _ROTATION_OFFSET)
+
+    return tuple(signature)
+
+
+def estimated_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def _band_keys(signature: Tuple[int, ...]) -> List[Tuple]:
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    return [
+        (band, signature[band * rows:(band + 1) * rows])
+        for band in range(LSH_BANDS)
+    ]
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+class NearDuplicateIndex:
+    """
+    LSH index of recent item signatures, persisted in SQLite.
+
+    Items kept by filter_items() are staged and only written on commit(),
+    after they have been dispatched. Items that failed dispatch are left out
+    so they are not dropped as duplicates when they are retried.
+    """
+
+    def __init__(self, path: Optional[str] = None, window_days: Optional[float] = None):
+        self.path = path or os.path.join(FEED_CACHE_DIR, "near_duplicates.sqlite3")
+        self.window_days = DEDUP_WINDOW_DAYS if window_days is None else window_days
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self._urls: Set[str] = set()
+        self._signatures: List[Tuple[int, ...]] = []
+        self._buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        self._staged: List[Tuple[str, Tuple[int, ...]]] = []
+
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.window_days)
+
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS signatures (
+                    canonical_url TEXT PRIMARY KEY,
+                    signature BLOB NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            rows = conn.execute(
+                "SELECT canonical_url, signature FROM signatures WHERE created_at >= ?",
+                (cutoff.isoformat(),),
+            ).fetchall()
+
+        for canonical_url, blob in rows:
+            self._add(canonical_url, tuple(array("Q", blob)))
+
+    def _add(self, canonical_url: str, signature: Optional[Tuple[int, ...]]) -> None:
+        self._urls.add(canonical_url)
+        if signature is None:
+            return
+
+        idx = len(self._signatures)
+        self._signatures.append(signature)
+        for key in _band_keys(signature):
+            self._buckets[key].append(idx)
+
+    def find_duplicate(self, signature: Tuple[int, ...]) -> bool:
+        """True if an indexed signature is at least NEAR_DUPLICATE_THRESHOLD similar."""
+        candidates = {
+            idx
+            for key in _band_keys(signature)
+            for idx in self._buckets.get(key, ())
+        }
+        return any(
+            estimated_similarity(signature, self._signatures[idx]) >= NEAR_DUPLICATE_THRESHOLD
+            for idx in candidates
+        )
+
+    def filter_items(self, items: List[Dict]) -> List[Dict]:
+        """
+        Drop items whose canonical URL or content matches an earlier item in
+        this batch or in the recent index. The first copy of a story wins.
+        """
+        return list(self.iter_unique(items))
+
+    def iter_unique(self, items: Iterable[Dict]) -> Iterator[Dict]:
+        """Streaming form of filter_items(); consumes items lazily."""
+        for item in items:
+            canonical_url = canonicalize_url(item["source_link"])
+            if canonical_url in self._urls:
+                print(f"[DEDUP] Duplicate URL: {item['source_link']}")
+                metrics.incr("dedup_dropped", reason="url")
+                continue
+
+            with metrics.span("discovery.minhash"):
+                signature = minhash_signature(f"{item.get('title', '')} {item['text']}")
+                duplicate = signature is not None and self.find_duplicate(signature)
+            if duplicate:
+                print(f"[DEDUP] Near-duplicate content: {item['source_link']}")
+                metrics.incr("dedup_dropped", reason="near_duplicate")
+                continue
+
+            self._add(canonical_url, signature)
+            if signature is not None:
+                self._staged.append((canonical_url, signature))
+            yield item
+
+    def commit(self, failed_links: Iterable[str] = ()) -> None:
+        """
+        Persist staged signatures, except those of failed_links, and evict
+        entries outside the window.
+        """
+        failed = {canonicalize_url(link) for link in failed_links}
+        staged = [(url, sig) for url, sig in self._staged if url not in failed]
+        self._staged = []
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=self.window_days)
+
+        with sqlite3.connect(self.path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO signatures (canonical_url, signature, created_at) "
+                "VALUES (?, ?, ?)",
+                [
+                    (url, array("Q", sig).tobytes(), now.isoformat())
+                    for url, sig in staged
+                ],
+            )
+            conn.execute("DELETE FROM signatures WHERE created_at < ?", (cutoff.isoformat(),))
@@ -1,26 +1,285 @@
-from typing import Dict, List
+import os
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from agent.config import model
 from agent.pipeline import run_article_ingestion
-from agent.db import has_seen_source
+from agent.db import fetch_seen_sources, forget_source, mark_source_seen, record_processed_source
+from agent.metrics import metrics
+from agent.models import IngestionOutcome
+from agent.routing import route_articles_to_topics
 
 
-def dispatch_items(items: List[Dict]) -> None:
-    """
-     Dispatch discovery items into the main agent pipeline,
-    skipping already-seen sources.
-    """
+# Number of articles ingested in parallel. 1 = strictly serial.
+DISPATCH_WORKERS = int(os.getenv("DISPATCH_WORKERS", "4"))
+# Articles from one vertical routed per LLM call. 1 = route individually.
+ROUTING_BATCH_SIZE = int(os.getenv("ROUTING_BATCH_SIZE", "8"))
+# Items buffered between the feed fetchers and the ingestion workers when
+# streaming. Fetching pauses while the buffer is full.
+DISPATCH_QUEUE_SIZE = int(os.getenv("DISPATCH_QUEUE_SIZE", "64"))
+# Send a partial routing batch once no new item has arrived for this long
+DISPATCH_FLUSH_SECONDS = float(os.getenv("DISPATCH_FLUSH_SECONDS", "0.2"))
+
+Route = Tuple[Optional[str], str]
+
+
+def _route_chunk(chunk: List[Dict]) -> List[Optional[Route]]:
+    """Batch-route one same-vertical chunk; None routes fall back per item."""
+    try:
+        with metrics.span("dispatch.batch_route"):
+            return route_articles_to_topics(
+                article_texts=[item["text"] for item in chunk],
+                vertical=chunk[0]["vertical"],
+                model=model,
+            )
+    except Exception as e:
+        print(f"[DISPATCH] Batch routing failed for {chunk[0]['vertical']}: {e}")
+        return [None] * len(chunk)
+
+
+def _batch_route(items: List[Dict], executor: Optional[ThreadPoolExecutor]) -> Dict[str, Route]:
+    """Route items in chunks of ROUTING_BATCH_SIZE per vertical."""
+    by_vertical: Dict[str, List[Dict]] = defaultdict(list)
+    for item in items:
+        by_vertical[item["vertical"]].append(item)
+
+    chunks = [
+        vertical_items[start:start + ROUTING_BATCH_SIZE]
+        for vertical_items in by_vertical.values()
+        for start in range(0, len(vertical_items), ROUTING_BATCH_SIZE)
+    ]
+    mapper = executor.map if executor else map
+
+    routes: Dict[str, Route] = {}
+    for chunk, chunk_routes in zip(chunks, mapper(_route_chunk, chunks)):
+        for item, route in zip(chunk, chunk_routes):
+            if route is not None:
+                routes[item["source_link"]] = route
+    return routes
+
+
+def _ingest_item(item: Dict, route: Optional[Route] = None) -> Optional[IngestionOutcome]:
+    """Run one item through the pipeline, isolating its failures."""
+    source_link = item["source_link"]
+
+    try:
+        outcome = run_article_ingestion(
+            article_text=item["text"],
+            vertical=item["vertical"],
+            source_link=source_link,
+            route=route,
+        )
+        record_processed_source(source_link, outcome)
+        return outcome
+    except Exception as e:
+        print(f"[DISPATCH] Failed for {source_link}: {e}")
+        metrics.incr("dispatch_failures")
+        forget_source(source_link)
+        return None
+
+
+def _claim_unseen(items: List[Dict], seen: Set[str]) -> List[Dict]:
+    """Drop already-seen items and mark the rest as seen (mutates seen)."""
+    to_ingest: List[Dict] = []
     for item in items:
         source_link = item["source_link"]
 
-        if has_seen_source(source_link):
+        if source_link in seen:
             print(f"[DISPATCH] Skipping already seen: {source_link}")
+            metrics.incr("dispatch_skipped_seen")
             continue
 
+        # Same link can appear in several feeds; only ingest it once
+        seen.add(source_link)
+        mark_source_seen(source_link)
+        to_ingest.append(item)
+
+    return to_ingest
+
+
+def dispatch_items(
+    items: List[Dict],
+    max_workers: Optional[int] = None,
+) -> Dict[str, Optional[IngestionOutcome]]:
+    """
+     Dispatch discovery items into the main agent pipeline,
+    skipping already-seen sources.
+
+    Items are first routed in same-vertical batches (ROUTING_BATCH_SIZE per
+    LLM call), then ingested on up to max_workers threads (default
+    DISPATCH_WORKERS). Returns the outcome per dispatched source_link
+    (None if it failed).
+    """
+    max_workers = max_workers or DISPATCH_WORKERS
+    with metrics.span("dispatch.seen_lookup"):
+        seen = fetch_seen_sources(item["source_link"] for item in items)
+    to_ingest = _claim_unseen(items, seen)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+    try:
+        routes: Dict[str, Route] = {}
+        if ROUTING_BATCH_SIZE > 1:
+            routes = _batch_route(to_ingest, executor)
+
+        routes_in_order = [routes.get(item["source_link"]) for item in to_ingest]
+        mapper = executor.map if executor else map
+        outcomes = list(mapper(_ingest_item, to_ingest, routes_in_order))
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return {
+        item["source_link"]: outcome
+        for item, outcome in zip(to_ingest, outcomes)
+    }
+
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+_END = object()
+
+
+def _produce(
+    items: Iterable[Dict],
+    buffer: "queue.Queue",
+    stop: threading.Event,
+    errors: List[Exception],
+) -> None:
+    """Feed items into the bounded buffer, blocking while it is full."""
+    try:
+        for item in items:
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                return
+    except Exception as e:
+        errors.append(e)
+    finally:
+        # Once the consumer has stopped nobody will read the end marker
+        if not stop.is_set():
+            buffer.put(_END)
+
+
+def _iter_batches(buffer: "queue.Queue", size: int, flush_after: float) -> Iterator[List[Dict]]:
+    """
+    Group buffered items into batches of up to size items from one feed, in
+    arrival order. A batch is sent when it is full, when the next item
+    comes from another feed, or when the buffer has been empty for
+    flush_after seconds. Feeds arrive whole and in order, so a batch's
+    content (and so its routing prompt) does not depend on fetch timing.
+    """
+    batch: List[Dict] = []
+    key = None
+    while True:
         try:
-            run_article_ingestion(
-                article_text=item["text"],
-                vertical=item["vertical"],
-                source_link=source_link,
-            )
-        except Exception as e:
-            print(f"[DISPATCH] Failed for {source_link}: {e}")
+            item = buffer.get(timeout=flush_after) if batch else buffer.get()
+        except queue.Empty:
+            yield batch
+            batch = []
+            continue
+        if item is _END:
+            break
+
+        item_key = (item.get("feed_url"), item["vertical"])
+        if batch and item_key != key:
+            yield batch
+            batch = []
+        key = item_key
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _dispatch_batch(batch: List[Dict]) -> List[Tuple[str, Optional[IngestionOutcome]]]:
+    """Route one batch with a single call, then ingest its items in order."""
+    routes = _batch_route(batch, None) if len(batch) > 1 else {}
+    return [
+        (item["source_link"], _ingest_item(item, routes.get(item["source_link"])))
+        for item in batch
+    ]
+
+
+def dispatch_stream(
+    items: Iterable[Dict],
+    max_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+) -> Dict[str, Optional[IngestionOutcome]]:
+    """
+    Streaming form of dispatch_items().
+
+    items is consumed on a producer thread into a bounded buffer (default
+    DISPATCH_QUEUE_SIZE). Buffered items are grouped into same-feed batches
+    of up to ROUTING_BATCH_SIZE, checked against seen sources, and each
+    batch is routed and ingested on one of max_workers threads. At most
+    max_workers batches run at once, and when they are all busy the buffer
+    fills and the producer blocks, so memory stays bounded however many
+    feeds there are.
+
+    If iterating items raises, the error is re-raised once in-flight batches
+    finish, so the caller does not commit state for items never dispatched.
+    """
+    max_workers = max_workers or DISPATCH_WORKERS
+    batch_size = max(ROUTING_BATCH_SIZE, 1)
+
+    buffer: "queue.Queue" = queue.Queue(maxsize=queue_size or DISPATCH_QUEUE_SIZE)
+    stop = threading.Event()
+    errors: List[Exception] = []
+    producer = threading.Thread(
+        target=_produce, args=(items, buffer, stop, errors), daemon=True
+    )
+    producer.start()
+
+    outcomes: Dict[str, Optional[IngestionOutcome]] = {}
+    seen: Set[str] = set()
+    executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+    in_flight = set()
+
+    def collect(results):
+        for source_link, outcome in results:
+            outcomes[source_link] = outcome
+
+    try:
+        for batch in _iter_batches(buffer, batch_size, DISPATCH_FLUSH_SECONDS):
+            links = [item["source_link"] for item in batch if item["source_link"] not in seen]
+            if links:
+                with metrics.span("dispatch.seen_lookup"):
+                    seen |= fetch_seen_sources(links)
+            batch = _claim_unseen(batch, seen)
+            if not batch:
+                continue
+
+            if executor is None:
+                collect(_dispatch_batch(batch))
+                continue
+
+            if len(in_flight) >= max_workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future.result())
+            in_flight.add(executor.submit(_dispatch_batch, batch))
+
+        for future in in_flight:
+            collect(future.result())
+    finally:
+        stop.set()
+        if executor:
+            executor.shutdown()
+
+    if errors:
+        print(f"[DISPATCH] Item source failed: {errors[0]}")
+        raise errors[0]
+
+    return outcomes
@@ -0,0 +1,237 @@
+"""
+Persistent per-feed state for RSS discovery.
+Keeps ETag / Last-Modified / body hash per feed so unchanged feeds can be skipped,
+and a high-water mark per feed so changed feeds only yield their new entries.
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+FEED_CACHE_DIR = os.getenv("FEED_CACHE_DIR", ".cache")
+
+
+class FeedValidatorStore:
+    """
+    SQLite-backed store of per-feed validators.
+
+    Validators seen during a run are staged in memory and only written on
+    commit(), so a run that crashes before dispatch finishes will re-fetch
+    the same feeds next time instead of getting a 304 for unprocessed items.
+    Likewise, a feed with an item that failed downstream keeps its old
+    validators, so the item is fetched again.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(FEED_CACHE_DIR, "feed_validators.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._staged: Dict[str, Dict] = {}
+        self._staged_links: Dict[str, Set[str]] = {}
+
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS feed_validators (
+                    feed_url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT
+                )
+                """
+            )
+            rows = conn.execute(
+                "SELECT feed_url, etag, last_modified, content_hash FROM feed_validators"
+            ).fetchall()
+
+        self._validators: Dict[str, Dict] = {
+            feed_url: {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash,
+            }
+            for feed_url, etag, last_modified, content_hash in rows
+        }
+
+    def get(self, feed_url: str) -> Optional[Dict]:
+        """Return the last committed validators for a feed, if any."""
+        with self._lock:
+            return self._validators.get(feed_url)
+
+    def stage(
+        self,
+        feed_url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content_hash: Optional[str],
+        source_links: Iterable[str] = (),
+    ) -> None:
+        """Record validators and the feed's item links from this run; persisted on commit()."""
+        with self._lock:
+            self._staged[feed_url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash,
+            }
+            self._staged_links[feed_url] = set(source_links)
+
+    def commit(self, failed_links: Iterable[str] = ()) -> None:
+        """
+        Persist staged validators, except for feeds with an item in
+        failed_links (items the pipeline did not durably handle).
+        """
+        failed = set(failed_links)
+        with self._lock:
+            staged, self._staged = self._staged, {}
+            staged_links, self._staged_links = self._staged_links, {}
+
+        staged = {
+            url: validators for url, validators in staged.items()
+            if not staged_links.get(url, set()) & failed
+        }
+        if not staged:
+            return
+
+        with sqlite3.connect(self.path) as conn:
+            conn.executemany(
+                """
+                INSERT INTO feed_validators (feed_url, etag, last_modified, content_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(feed_url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash
+                """,
+                [
+                    (url, v["etag"], v["last_modified"], v["content_hash"])
+                    for url, v in staged.items()
+                ],
+            )
+
+        with self._lock:
+            self._validators.update(staged)
+
+
+class FeedWatermarkStore:
+    """
+    SQLite-backed per-feed high-water marks.
+
+    A watermark is the newest `published` timestamp handled for a feed, plus
+    the links of handled entries still listed in the feed (for ties and
+    undated entries). admit() drops entries at or behind the watermark and
+    stages the rest; commit() advances each watermark past the staged
+    entries, but never past the oldest one that failed downstream, so that
+    entry is emitted again on the next run.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(FEED_CACHE_DIR, "feed_watermarks.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._staged: Dict[str, Tuple[Set[str], List[Dict]]] = {}
+
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS feed_watermarks (
+                    feed_url TEXT PRIMARY KEY,
+                    published_ts REAL,
+                    entry_links TEXT NOT NULL
+                )
+                """
+            )
+            rows = conn.execute(
+                "SELECT feed_url, published_ts, entry_links FROM feed_watermarks"
+            ).fetchall()
+
+        self._watermarks: Dict[str, Tuple[Optional[float], Set[str]]] = {
+            feed_url: (published_ts, set(json.loads(entry_links)))
+            for feed_url, published_ts, entry_links in rows
+        }
+
+    def admit(self, feed_url: str, items: List[Dict]) -> List[Dict]:
+        """
+        Return the items newer than the feed's committed watermark and stage
+        them; the watermark moves on commit().
+        """
+        with self._lock:
+            published_ts, links = self._watermarks.get(feed_url, (None, set()))
+
+        new_items = [
+            item for item in items
+            if item["source_link"] not in links
+            and (
+                published_ts is None
+                or item.get("published_ts") is None
+                or item["published_ts"] >= published_ts
+            )
+        ]
+
+        with self._lock:
+            self._staged[feed_url] = (
+                {item["source_link"] for item in items},
+                new_items,
+            )
+        return new_items
+
+    def commit(self, failed_links: Iterable[str] = ()) -> None:
+        """
+        Advance the watermarks of all staged feeds.
+
+        failed_links are entries the pipeline did not durably handle; they
+        stay behind the watermark and are re-emitted next run.
+        """
+        failed = set(failed_links)
+
+        with self._lock:
+            staged, self._staged = self._staged, {}
+            current = {url: self._watermarks.get(url, (None, set())) for url in staged}
+
+        if not staged:
+            return
+
+        updated: Dict[str, Tuple[Optional[float], Set[str]]] = {}
+        for feed_url, (feed_links, new_items) in staged.items():
+            published_ts, links = current[feed_url]
+
+            # Walk dated entries oldest first and stop at the first failure
+            dated = sorted(
+                (item["published_ts"], item["source_link"])
+                for item in new_items
+                if item.get("published_ts") is not None
+            )
+            for ts, link in dated:
+                if link in failed:
+                    break
+                published_ts = ts if published_ts is None else max(published_ts, ts)
+
+            # Links no longer in the feed can't come back, so drop them to
+            # keep the set bounded by the feed's size
+            links = {link for link in links if link in feed_links}
+            links.update(
+                item["source_link"] for item in new_items
+                if item["source_link"] not in failed
+            )
+            updated[feed_url] = (published_ts, links)
+
+        with sqlite3.connect(self.path) as conn:
+            conn.executemany(
+                """
+                INSERT INTO feed_watermarks (feed_url, published_ts, entry_links)
+                VALUES (?, ?, ?)
+                ON CONFLICT(feed_url) DO UPDATE SET
+                    published_ts = excluded.published_ts,
+                    entry_links = excluded.entry_links
+                """,
+                [
+                    (url, published_ts, json.dumps(sorted(links)))
+                    for url, (published_ts, links) in updated.items()
+                ],
+            )
+
+        with self._lock:
+            self._watermarks.update(updated)
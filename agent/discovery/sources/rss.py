@@ -1,40 +1,265 @@
-from typing import List, Dict
+import calendar
+import hashlib
+import os
+import threading
+import urllib.error
+import urllib.request
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPResponse
+from itertools import islice
+from typing import Iterator, List, Dict, Optional, Tuple, TYPE_CHECKING
+from urllib.parse import urlparse
+
 import feedparser
 
+from agent.metrics import metrics
+
+if TYPE_CHECKING:
+    from agent.discovery.sources.feed_cache import FeedValidatorStore, FeedWatermarkStore
+
+
+# Global cap on feeds fetched at once, and a per-host cap so feeds sharing a
+# host (e.g. the three arxiv.org listings) are not hammered in parallel.
+MAX_CONCURRENT_FEEDS = int(os.getenv("RSS_MAX_CONCURRENT_FEEDS", "8"))
+MAX_CONCURRENT_PER_HOST = int(os.getenv("RSS_MAX_CONCURRENT_PER_HOST", "2"))
+FETCH_TIMEOUT_SECONDS = float(os.getenv("RSS_FETCH_TIMEOUT_SECONDS", "20"))
+USER_AGENT = "research-agent/1.0 (+https://github.com/mohitjain121/research-agent)"
+
+
+def _normalize_entries(feed, vertical: str, feed_url: str) -> List[Dict]:
+    """Turn parsed feed entries into discovery items."""
+    items: List[Dict] = []
+
+    for entry in feed.entries:
+        published = entry.get("published_parsed") or entry.get("updated_parsed")
+        item = {
+            "title": entry.get("title", ""),
+            "text": (
+                entry.get("summary")
+                or entry.get("description")
+                or ""
+            ),
+            "source": "rss",
+            "source_link": entry.get("link", ""),
+            "published_at": entry.get("published", None),
+            # feedparser normalizes parsed dates to UTC
+            "published_ts": float(calendar.timegm(published)) if published else None,
+            "vertical": vertical,
+            "feed_url": feed_url,
+        }
+
+        # hard filter: only keep usable content
+        if item["text"] and item["source_link"]:
+            items.append(item)
+
+    return items
+
+
+def _download_feed(
+    feed_url: str,
+    validators: Optional[Dict],
+) -> Optional[HTTPResponse]:
+    """
+    GET a feed, sending conditional headers when validators are known.
+    Returns None on 304 Not Modified.
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    request = urllib.request.Request(feed_url, headers=headers)
+    try:
+        return urllib.request.urlopen(request, timeout=FETCH_TIMEOUT_SECONDS)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None
+        raise
+
+
+def _fetch_feed(
+    feed_url: str,
+    vertical: str,
+    host_limits: Dict[str, threading.Semaphore],
+    validator_store: Optional["FeedValidatorStore"] = None,
+    watermark_store: Optional["FeedWatermarkStore"] = None,
+) -> List[Dict]:
+    """
+    Fetch a single feed, respecting the per-host limit.
+    Skips parsing when the server answers 304 or the body hash is unchanged,
+    and drops entries behind the feed's watermark.
+    """
+    with metrics.span("discovery.fetch_feed"):
+        items = _fetch_feed_items(feed_url, vertical, host_limits, validator_store)
+    if watermark_store and items:
+        new_items = watermark_store.admit(feed_url, items)
+        metrics.incr("watermark_skipped", len(items) - len(new_items), vertical=vertical)
+        items = new_items
+    metrics.incr("feed_items", len(items), vertical=vertical)
+    return items
+
+
+def _fetch_feed_items(
+    feed_url: str,
+    vertical: str,
+    host_limits: Dict[str, threading.Semaphore],
+    validator_store: Optional["FeedValidatorStore"],
+) -> List[Dict]:
+    host = urlparse(feed_url).netloc.lower()
+    validators = validator_store.get(feed_url) if validator_store else None
+
+    try:
+        with host_limits[host]:
+            response = _download_feed(feed_url, validators)
+            if response is None:
+                print(f"[RSS] Not modified: {feed_url}")
+                metrics.incr("feeds", status="not_modified")
+                return []
+
+            with response:
+                body = response.read()
+                response_headers = {k.lower(): v for k, v in response.headers.items()}
+                response_headers.setdefault("content-location", response.geturl())
+
+        content_hash = hashlib.sha256(body).hexdigest()
+
+        unchanged = bool(validators) and validators.get("content_hash") == content_hash
+        items: List[Dict] = []
+        if not unchanged:
+            with metrics.span("discovery.parse_feed"):
+                feed = feedparser.parse(body, response_headers=response_headers)
+                items = _normalize_entries(feed, vertical, feed_url)
+
+        if validator_store:
+            validator_store.stage(
+                feed_url,
+                etag=response_headers.get("etag"),
+                last_modified=response_headers.get("last-modified"),
+                content_hash=content_hash,
+                source_links=[item["source_link"] for item in items],
+            )
+
+        if unchanged:
+            print(f"[RSS] Unchanged content: {feed_url}")
+            metrics.incr("feeds", status="unchanged")
+            return []
+
+        metrics.incr("feeds", status="fetched")
+        return items
+    except Exception as e:
+        print(f"[RSS] Failed for {feed_url}: {e}")
+        metrics.incr("feeds", status="failed")
+        return []
+
+
+def _prepare_jobs(
+    feed_map: Dict[str, List[str]],
+    per_host_limit: int,
+) -> Tuple[List[Tuple[str, str]], Dict[str, threading.Semaphore]]:
+    """Flatten feed_map into (feed_url, vertical) jobs plus per-host semaphores."""
+    jobs = [
+        (feed_url, vertical)
+        for vertical, feed_urls in feed_map.items()
+        for feed_url in feed_urls
+    ]
+
+    host_limits: Dict[str, threading.Semaphore] = defaultdict(
+        lambda: threading.BoundedSemaphore(per_host_limit)
+    )
+    # Create every semaphore up front; defaultdict is not thread-safe on insert.
+    for feed_url, _ in jobs:
+        host_limits[urlparse(feed_url).netloc.lower()]
+
+    return jobs, host_limits
+
 
 def fetch_rss_by_vertical(
-    feed_map: Dict[str, List[str]]
+    feed_map: Dict[str, List[str]],
+    max_workers: Optional[int] = None,
+    per_host_limit: Optional[int] = None,
+    validator_store: Optional["FeedValidatorStore"] = None,
+    watermark_store: Optional["FeedWatermarkStore"] = None,
 ) -> List[Dict]:
     """
     Fetch RSS feeds grouped by vertical.
     Returns normalized discovery items with hard vertical assignment.
+
+    Feeds are fetched concurrently (up to max_workers at once, and at most
+    per_host_limit per host). Items keep the same order as a sequential walk
+    of feed_map. Pass max_workers=1 to fetch one feed at a time.
+
+    If a validator_store is given, requests are conditional (ETag /
+    Last-Modified) and unchanged feeds yield no items. If a watermark_store
+    is given, each feed only yields entries newer than its watermark. The
+    caller is responsible for committing both stores once the items are
+    handled.
     """
+    max_workers = max_workers or MAX_CONCURRENT_FEEDS
+    per_host_limit = per_host_limit or MAX_CONCURRENT_PER_HOST
+
+    jobs, host_limits = _prepare_jobs(feed_map, per_host_limit)
+    if not jobs:
+        return []
+
     all_items: List[Dict] = []
 
-    for vertical, feed_urls in feed_map.items():
-        for feed_url in feed_urls:
-            try:
-                feed = feedparser.parse(feed_url)
-
-                for entry in feed.entries:
-                    item = {
-                        "title": entry.get("title", ""),
-                        "text": (
-                            entry.get("summary")
-                            or entry.get("description")
-                            or ""
-                        ),
-                        "source": "rss",
-                        "source_link": entry.get("link", ""),
-                        "published_at": entry.get("published", None),
-                        "vertical": vertical,
-                    }
-
-                    # hard filter: only keep usable content
-                    if item["text"] and item["source_link"]:
-                        all_items.append(item)
-
-            except Exception as e:
-                print(f"[RSS] Failed for {feed_url}: {e}")
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        futures = [
+            executor.submit(
+                _fetch_feed, feed_url, vertical, host_limits, validator_store, watermark_store
+            )
+            for feed_url, vertical in jobs
+        ]
+        for future in futures:
+            all_items.extend(future.result())
 
     return all_items
+
+
+def iter_rss_by_vertical(
+    feed_map: Dict[str, List[str]],
+    max_workers: Optional[int] = None,
+    per_host_limit: Optional[int] = None,
+    validator_store: Optional["FeedValidatorStore"] = None,
+    watermark_store: Optional["FeedWatermarkStore"] = None,
+) -> Iterator[Dict]:
+    """
+    Streaming variant of fetch_rss_by_vertical.
+
+    Yields each feed's items as soon as that feed and every feed before it
+    in feed_map are fetched, so items come out in the same order as
+    fetch_rss_by_vertical and downstream batching is reproducible. At most
+    max_workers feeds are in flight or waiting to be consumed; the next feed
+    is only submitted after the oldest one has been yielded, so a slow
+    consumer holds back fetching instead of buffering every feed.
+    """
+    max_workers = max_workers or MAX_CONCURRENT_FEEDS
+    per_host_limit = per_host_limit or MAX_CONCURRENT_PER_HOST
+
+    jobs, host_limits = _prepare_jobs(feed_map, per_host_limit)
+    if not jobs:
+        return
+
+    remaining = iter(jobs)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        in_flight = deque(
+            executor.submit(
+                _fetch_feed, feed_url, vertical, host_limits, validator_store, watermark_store
+            )
+            for feed_url, vertical in islice(remaining, max_workers)
+        )
+
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+            job = next(remaining, None)
+            if job is not None:
+                feed_url, vertical = job
+                in_flight.append(executor.submit(
+                    _fetch_feed, feed_url, vertical, host_limits,
+                    validator_store, watermark_store,
+                ))
@@ -0,0 +1,172 @@
+"""
+LLM call gateway.
+Wraps the chat model with request/token rate limits, a concurrency cap and 429 backoff.
+"""
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from agent.metrics import metrics
+from agent.prompt_budget import count_tokens
+
+
+# =============================================================================
+# TOKEN BUCKET
+# =============================================================================
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.capacity = float(rate_per_minute)
+        self.rate_per_second = rate_per_minute / 60.0
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Block until `amount` tokens are available, then take them."""
+        # A single request larger than the bucket would wait forever
+        amount = min(amount, self.capacity)
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate_per_second
+            self._sleep(wait)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the provider reports a rate limit."""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+
+# =============================================================================
+# ERROR CLASSIFICATION
+# =============================================================================
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(messages: List) -> int:
+    """Rough prompt token count of a message list."""
+    return count_tokens("".join(str(getattr(m, "content", m)) for m in messages))
+
+
+# =============================================================================
+# GATEWAY
+# =============================================================================
+
+class LLMGateway:
+    """
+    Drop-in wrapper around a chat model's invoke().
+
+    Every call takes one request from the RPM bucket and its estimated
+    tokens from the TPM bucket, runs under a concurrency semaphore, and is
+    retried with exponential backoff (honouring Retry-After) on 429 / 5xx.
+    """
+
+    def __init__(
+        self,
+        model,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 30_000,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        expected_output_tokens: int = 512,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.model = model
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.expected_output_tokens = expected_output_tokens
+
+        self._sleep = sleep
+        self._requests = TokenBucket(requests_per_minute, clock=clock, sleep=sleep)
+        self._tokens = TokenBucket(tokens_per_minute, clock=clock, sleep=sleep)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.model, "model_name", None) or getattr(self.model, "model", "unknown")
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+        metrics.incr(f"llm_{key}")
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return delay * random.uniform(0.5, 1.0)
+
+    def invoke(self, messages, **kwargs):
+        estimated = estimate_tokens(messages) + self.expected_output_tokens
+
+        for attempt in range(self.max_retries + 1):
+            with metrics.span("llm.rate_limit_wait"):
+                self._requests.acquire()
+                self._tokens.acquire(estimated)
+
+            try:
+                with self._semaphore, metrics.span("llm.call"):
+                    self._count("calls")
+                    return self.model.invoke(messages, **kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                if status not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    self._count("failures")
+                    raise
+
+                if status == 429:
+                    self._count("rate_limited")
+                    self._requests.drain()
+
+                delay = self._backoff_delay(attempt, e)
+                print(f"[LLM] HTTP {status}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                self._count("retries")
+                self._sleep(delay)
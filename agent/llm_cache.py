@@ -0,0 +1,183 @@
+"""
+Persistent content-addressed cache of LLM responses.
+Keyed on model name + hash of the message list, stored in SQLite.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage
+
+from agent.metrics import metrics
+
+
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "on")      # off | on | replay
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite3"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+LLM_CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+# Evict at most once per this many writes
+_EVICT_EVERY = 100
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a prompt has no cached response."""
+
+
+def cache_key(model_name: str, messages: List, **kwargs) -> str:
+    """Stable hash of the model name, message types/contents and call kwargs."""
+    payload = {
+        "model": model_name,
+        "messages": [
+            [type(m).__name__, getattr(m, "content", str(m))]
+            for m in messages
+        ],
+        "kwargs": kwargs,
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite store of response texts with age and size eviction."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+    ):
+        self.path = path or LLM_CACHE_PATH
+        self.max_entries = max_entries or LLM_CACHE_MAX_ENTRIES
+        self.max_age_seconds = (max_age_days or LLM_CACHE_MAX_AGE_DAYS) * 86400
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def put(self, key: str, model_name: str, content: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model_name, content, now, now),
+            )
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,)
+        )
+        self._conn.execute(
+            """
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+
+class CachedModel:
+    """
+    Wraps a chat model's invoke() with a ResponseCache.
+
+    mode="on" serves hits and stores misses, mode="replay" raises
+    CacheMissError instead of calling the provider, mode="off" bypasses
+    the cache entirely. Callers discard() responses that fail to parse, so
+    retries and later runs ask the provider again.
+    """
+
+    def __init__(self, model, cache: Optional[ResponseCache] = None, mode: Optional[str] = None):
+        self.model = model
+        self.mode = mode or LLM_CACHE_MODE
+        if self.mode not in ("off", "on", "replay"):
+            raise ValueError(f"Invalid LLM cache mode: {self.mode}")
+
+        self.cache = cache if cache is not None or self.mode == "off" else ResponseCache()
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.model, "model_name", None) or getattr(self.model, "model", "unknown")
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+        metrics.incr(f"llm_cache_{key}")
+
+    def invoke(self, messages, **kwargs):
+        if self.mode == "off":
+            return self.model.invoke(messages, **kwargs)
+
+        key = cache_key(self.model_name, messages, **kwargs)
+        content = self.cache.get(key)
+
+        if content is not None:
+            self._count("hits")
+            return AIMessage(content=content)
+
+        self._count("misses")
+        if self.mode == "replay":
+            raise CacheMissError(f"No cached response for prompt {key[:12]} in replay mode")
+
+        response = self.model.invoke(messages, **kwargs)
+        self.cache.put(key, self.model_name, response.content)
+        return response
+
+    def discard(self, messages, **kwargs) -> None:
+        """Drop the cached response for this prompt."""
+        if self.mode == "on":
+            self.cache.delete(cache_key(self.model_name, messages, **kwargs))
+
+
+def discard_response(model, messages, **kwargs) -> None:
+    """Drop a response that failed to parse from model's cache, if it has one."""
+    discard = getattr(model, "discard", None)
+    if discard is not None:
+        discard(messages, **kwargs)
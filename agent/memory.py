@@ -2,10 +2,21 @@
 Memory update logic.
 Handles heuristic section detection, LLM section selection, and memory rewriting.
 """
-from typing import List, Optional, Tuple
+import json
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from agent.llm_cache import discard_response
 from agent.models import SchemaSection, TopicMemory, MemoryUpdateProposal
+from agent.prompt_budget import PROMPT_BUDGETS, fit_article, truncate_text
+
+
+# "two_step": select_schema_section then build_memory_update (2+ LLM calls)
+# "fused": build_fused_memory_update picks and rewrites in one call
+MEMORY_UPDATE_MODES = ("two_step", "fused")
+MEMORY_UPDATE_MODE = os.getenv("MEMORY_UPDATE_MODE", "two_step")
 
 
 # =============================================================================
@@ -65,39 +76,173 @@ NEW_BELIEF: <updated_section_text>
 """
 
 
+FUSED_SECTION_UPDATE_PROMPT = """
+You are a research editor responsible for maintaining a structured knowledge base.
+
+Below is:
+1) A list of candidate schema sections identified by heuristics, each with its current belief text
+2) A new article or research excerpt
+
+Your task:
+- From the candidate schema sections, choose EXACTLY ONE section that is most impacted by the new information
+- If none are meaningfully impacted, respond with NO_UPDATE and stop
+- Otherwise rewrite that section's text to reflect the most accurate current understanding
+
+Rules:
+- You may ONLY choose from the provided candidate sections
+- Do NOT invent new sections
+- Your justification must be 1–2 sentences and explain why this section is most impacted
+- The new belief must integrate relevant new information from the article
+- Preserve useful prior context unless it is contradicted or outdated
+- Do NOT introduce information not present in the old belief or the article
+- Keep the new belief concise (1–2 short paragraphs)
+
+Output format (follow exactly):
+
+SECTION: <one_candidate_section_or_NO_UPDATE>
+REASON: <brief justification>
+NEW_BELIEF: <updated_section_text, omitted for NO_UPDATE>
+"""
+
+
 # =============================================================================
 # HEURISTIC SECTION DETECTION
 # =============================================================================
 
-def identify_candidate_sections(article_text: str) -> Optional[List[str]]:
+# Phrase -> weight per section. A section becomes a candidate once its
+# summed weight reaches SECTION_MATCH_MIN_SCORE, so weak cues need company.
+SECTION_PHRASES: Dict[str, Dict[str, float]] = {
+    SchemaSection.PREDECESSORS_LIMITATIONS.value: {
+        "previous models": 1.0,
+        "prior approaches": 1.0,
+        "prior work": 1.0,
+        "existing methods": 1.0,
+        "existing approaches": 1.0,
+        "traditional approaches": 1.0,
+        "limitations of": 1.0,
+        "falls short": 1.0,
+        "struggle to": 0.5,
+        "fail to": 0.5,
+        "bottleneck": 0.5,
+        "previously": 0.5,
+    },
+    SchemaSection.CORE_PROPOSAL.value: {
+        "we propose": 1.0,
+        "this paper introduces": 1.0,
+        "this paper presents": 1.0,
+        "we introduce": 1.0,
+        "we present": 1.0,
+        "novel approach": 1.0,
+        "novel method": 1.0,
+        "new framework": 1.0,
+        "introducing": 0.5,
+        "announcing": 0.5,
+        "launches": 0.5,
+        "our method": 0.5,
+    },
+    SchemaSection.ENABLING_CONDITIONS.value: {
+        "enabled by": 1.0,
+        "made possible by": 1.0,
+        "powered by": 1.0,
+        "prerequisite": 1.0,
+        "regulatory approval": 1.0,
+        "availability of": 0.5,
+        "adoption of": 0.5,
+        "infrastructure": 0.5,
+        "driven by": 0.5,
+        "thanks to": 0.5,
+        "cheaper compute": 0.5,
+    },
+    SchemaSection.PROBLEMS_SOLVED.value: {
+        "scales better": 1.0,
+        "solves prior limitations": 1.0,
+        "outperforms": 1.0,
+        "overcomes": 1.0,
+        "addresses the problem": 1.0,
+        "state-of-the-art results": 1.0,
+        "more efficient": 0.5,
+        "faster than": 0.5,
+        "cheaper than": 0.5,
+        "eliminates": 0.5,
+        "reduces": 0.5,
+    },
+    SchemaSection.OPERATIONAL_UNDERSTANDING.value: {
+        "market unlocked": 1.0,
+        "novel product": 1.0,
+        "multiple business usecases": 1.0,
+        "model works like this": 1.0,
+        "how it works": 1.0,
+        "business model": 1.0,
+        "unit economics": 1.0,
+        "go-to-market": 1.0,
+        "in production": 0.5,
+        "use cases": 0.5,
+        "pricing": 0.5,
+        "revenue": 0.5,
+        "customers": 0.5,
+    },
+}
+
+SECTION_MATCH_MIN_SCORE = 1.0
+
+
+class SectionMatcher:
     """
-    Heuristically identify which schema sections may be impacted.
-    Returns a list of candidate section names or None.
+    Weighted section phrases matched as plain substrings of the lowercased
+    text, so "we propose" also counts inside "we proposed". Scores every
+    section in one pass over the phrase table.
     """
-    text = article_text.lower()
-    matched_sections = []
 
-    if "previous models" in text or "prior approaches" in text:
-        matched_sections.append("predecessors_limitations")
+    def __init__(
+        self,
+        phrases: Optional[Dict[str, Dict[str, float]]] = None,
+        min_score: float = SECTION_MATCH_MIN_SCORE,
+    ):
+        phrases = phrases or SECTION_PHRASES
+        self.min_score = min_score
+        self.sections = [s.value for s in SchemaSection if s.value in phrases]
 
-    if "we propose" in text or "this paper introduces" in text:
-        matched_sections.append("core_proposal")
+        self._weights = [
+            (phrase.lower(), section, weight)
+            for section, table in phrases.items()
+            for phrase, weight in table.items()
+        ]
 
-    if "scales better" in text or "solves prior limitations" in text:
-        matched_sections.append("problems_solved")
+    def _candidates(self, scores: Dict[str, float]) -> Optional[List[str]]:
+        matched = [s for s in self.sections if scores.get(s, 0.0) >= self.min_score]
+        return matched or None
+
+    def score(self, text: str) -> Dict[str, float]:
+        """Summed phrase weights per section (each phrase counted once)."""
+        text = text.lower()
+        scores: Dict[str, float] = defaultdict(float)
+        for phrase, section, weight in self._weights:
+            if phrase in text:
+                scores[section] += weight
+        return dict(scores)
+
+    def candidates(self, text: str) -> Optional[List[str]]:
+        return self._candidates(self.score(text))
 
-    if (
-        "market unlocked" in text
-        or "novel product" in text
-        or "multiple business usecases" in text
-        or "model works like this" in text
-    ):
-        matched_sections.append("operational_understanding")
 
-    if not matched_sections:
-        return None
+def _load_phrase_table() -> Dict[str, Dict[str, float]]:
+    """SECTION_PHRASES, or a JSON table of the same shape from SECTION_PHRASES_PATH."""
+    path = os.getenv("SECTION_PHRASES_PATH")
+    if not path:
+        return SECTION_PHRASES
+    with open(path) as f:
+        return json.load(f)
 
-    return matched_sections
+
+_default_matcher = SectionMatcher(_load_phrase_table())
+
+
+def identify_candidate_sections(article_text: str) -> Optional[List[str]]:
+    """
+    Heuristically identify which schema sections may be impacted.
+    Returns a list of candidate section names or None.
+    """
+    return _default_matcher.candidates(article_text)
 
 
 # =============================================================================
@@ -140,13 +285,13 @@ def select_schema_section(
     base_prompt = SECTION_SELECTION_PROMPT + f"""
 
 Current Topic Understanding:
-{topic_memory_text}
+{truncate_text(topic_memory_text, PROMPT_BUDGETS["topic_memory"])}
 
 Candidate Schema Sections:
 {candidate_sections}
 
 Article Text:
-{article_text}
+{fit_article(article_text)}
 """
 
     for attempt in range(max_retries):
@@ -154,10 +299,11 @@ Article Text:
         if attempt > 0:
             prompt += "\nIMPORTANT: Follow the output format exactly."
 
-        response = model.invoke([
+        messages = [
             SystemMessage(content="You are a careful research analyst."),
             HumanMessage(content=prompt),
-        ])
+        ]
+        response = model.invoke(messages)
 
         section, reason = parse_llm_section_response(
             response.content,
@@ -166,6 +312,7 @@ Article Text:
 
         if section is not None:
             return section, reason
+        discard_response(model, messages)
 
     return None, "LLM failed to select a valid section."
 
@@ -197,18 +344,23 @@ Schema Section Name:
 {chosen_section}
 
 Current Belief:
-{old_belief}
+{truncate_text(old_belief, PROMPT_BUDGETS["section_belief"])}
 
 Article Text:
-{article_text}
+{fit_article(article_text)}
 """
 
-    response = model.invoke([
+    messages = [
         SystemMessage(content="You are a careful research editor."),
         HumanMessage(content=prompt),
-    ])
+    ]
+    response = model.invoke(messages)
 
-    new_belief = parse_new_belief(response.content)
+    try:
+        new_belief = parse_new_belief(response.content)
+    except ValueError:
+        discard_response(model, messages)
+        raise
 
     return MemoryUpdateProposal(
         topic_id=topic_memory.topic_id,
@@ -218,3 +370,88 @@ Article Text:
         why_this_matters=justification,
         source_link=source_link,
     )
+
+
+# =============================================================================
+# FUSED SELECTION + REWRITE
+# =============================================================================
+
+def parse_fused_update_response(
+    llm_text: str,
+    candidate_sections: List[str],
+) -> Tuple[Optional[str], str, Optional[str]]:
+    """Parse SECTION / REASON / NEW_BELIEF. Section is None if the format is invalid."""
+    head, _, belief_text = llm_text.partition("NEW_BELIEF:")
+
+    section, reason = parse_llm_section_response(head, candidate_sections)
+    if section is None or section == "NO_UPDATE":
+        return section, reason, None
+
+    new_belief = belief_text.strip()
+    if not new_belief:
+        return None, "Missing new belief.", None
+
+    return section, reason, new_belief
+
+
+def build_fused_memory_update(
+    topic_memory: TopicMemory,
+    candidate_sections: List[str],
+    article_text: str,
+    source_link: str,
+    model,
+    max_retries: int = 2,
+) -> Tuple[Optional[MemoryUpdateProposal], str]:
+    """
+    Select the impacted section and rewrite it in a single LLM call.
+    Returns (proposal, reason); proposal is None for NO_UPDATE or failure,
+    with reason "NO_UPDATE" in the first case.
+    """
+    if not candidate_sections:
+        return None, "No candidate sections."
+
+    sections_block = "\n\n".join(
+        f"[{section}]\n{truncate_text(getattr(topic_memory, section), PROMPT_BUDGETS['section_belief'])}"
+        for section in candidate_sections
+    )
+
+    base_prompt = FUSED_SECTION_UPDATE_PROMPT + f"""
+
+Candidate Schema Sections (current beliefs):
+{sections_block}
+
+Article Text:
+{fit_article(article_text)}
+"""
+
+    for attempt in range(max_retries):
+        prompt = base_prompt
+        if attempt > 0:
+            prompt += "\nIMPORTANT: Follow the output format exactly."
+
+        messages = [
+            SystemMessage(content="You are a careful research editor."),
+            HumanMessage(content=prompt),
+        ]
+        response = model.invoke(messages)
+
+        section, reason, new_belief = parse_fused_update_response(
+            response.content,
+            candidate_sections,
+        )
+
+        if section == "NO_UPDATE":
+            return None, "NO_UPDATE"
+
+        if section is not None:
+            return MemoryUpdateProposal(
+                topic_id=topic_memory.topic_id,
+                schema_section=SchemaSection(section),
+                old_belief=getattr(topic_memory, section),
+                new_belief=new_belief,
+                why_this_matters=reason,
+                source_link=source_link,
+            ), reason
+        discard_response(model, messages)
+
+    return None, "LLM failed to produce a valid fused update."
@@ -0,0 +1,250 @@
+"""
+Run metrics.
+Timing spans per pipeline stage, counters, an optional cProfile / tracemalloc
+hook, and output as a JSON run report and a Prometheus textfile.
+Disabled by default; when off, span() and incr() return immediately.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_REPORT_PATH = os.getenv("METRICS_REPORT_PATH", "run_report.json")
+# e.g. /var/lib/node_exporter/textfile/research_agent.prom; unset = no textfile
+METRICS_TEXTFILE_PATH = os.getenv("METRICS_TEXTFILE_PATH")
+PROFILE_MODE = os.getenv("PROFILE_MODE", "")  # "" | cprofile | tracemalloc
+PROFILE_OUTPUT = os.getenv("PROFILE_OUTPUT", "profile.pstats")
+
+# Samples kept per span for quantiles; count / sum / max stay exact beyond it.
+_MAX_SAMPLES = 10_000
+_PROM_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.observe(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class _SpanStats:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class Metrics:
+    """
+    Thread-safe collector for one process run.
+
+    span(name) times a block; incr(name, **labels) bumps a counter. Span
+    names are dotted by layer ("ingest.route", "db.fetch_topic_memory").
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: Dict[str, _SpanStats] = defaultdict(_SpanStats)
+        self._counters: Dict[Tuple[str, LabelKey], float] = defaultdict(float)
+        self._extra: Dict[str, object] = {}
+        self._started = time.time()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._extra.clear()
+            self._started = time.time()
+
+    # --- recording -----------------------------------------------------------
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._spans[name]
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            if len(stats.samples) < _MAX_SAMPLES:
+                stats.samples.append(seconds)
+
+    def incr(self, name: str, amount: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] += amount
+
+    # --- profiling -----------------------------------------------------------
+
+    @contextmanager
+    def profile(self, mode: Optional[str] = None, top: int = 20):
+        """
+        Profile the enclosed block with cProfile (stats dumped to
+        PROFILE_OUTPUT) or tracemalloc (top allocation sites). The summary is
+        added to the run report. No-op unless a mode is set.
+        """
+        mode = PROFILE_MODE if mode is None else mode
+        if mode == "cprofile":
+            import cProfile
+            import io
+            import pstats
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(PROFILE_OUTPUT)
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+                self._extra["cprofile"] = {"output": PROFILE_OUTPUT, "top": out.getvalue()}
+        elif mode == "tracemalloc":
+            import tracemalloc
+
+            tracemalloc.start()
+            try:
+                yield
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self._extra["tracemalloc"] = {
+                    "peak_bytes": peak,
+                    "top": [
+                        {"site": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                        for stat in snapshot.statistics("lineno")[:top]
+                    ],
+                }
+        else:
+            yield
+
+    # --- output --------------------------------------------------------------
+
+    def report(self) -> Dict:
+        with self._lock:
+            spans = {
+                name: {
+                    "count": stats.count,
+                    "total_s": round(stats.total, 6),
+                    "mean_s": round(stats.total / stats.count, 6) if stats.count else 0.0,
+                    "p50_s": round(_quantile(sorted(stats.samples), 0.5), 6),
+                    "p95_s": round(_quantile(sorted(stats.samples), 0.95), 6),
+                    "max_s": round(stats.max, 6),
+                }
+                for name, stats in sorted(self._spans.items())
+            }
+            counters: Dict[str, object] = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                if labels:
+                    counters.setdefault(name, {})[",".join(f"{k}={v}" for k, v in labels)] = value
+                else:
+                    counters[name] = value
+            extra = dict(self._extra)
+
+        return {
+            "started_at": datetime.fromtimestamp(self._started, timezone.utc).isoformat(),
+            "wall_s": round(time.time() - self._started, 3),
+            "spans": spans,
+            "counters": counters,
+            **extra,
+        }
+
+    def prometheus_text(self, prefix: str = "research_agent") -> str:
+        lines = [
+            f"# HELP {prefix}_span_seconds Time spent per pipeline stage.",
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        with self._lock:
+            for name, stats in sorted(self._spans.items()):
+                ordered = sorted(stats.samples)
+                for q in (0.5, 0.95):
+                    lines.append(
+                        f'{prefix}_span_seconds{{span="{name}",quantile="{q}"}} {_quantile(ordered, q):.6f}'
+                    )
+                lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {stats.total:.6f}')
+                lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {stats.count}')
+
+            by_name: Dict[str, List[Tuple[LabelKey, float]]] = defaultdict(list)
+            for (name, labels), value in self._counters.items():
+                by_name[name].append((labels, value))
+
+        for name in sorted(by_name):
+            metric = f"{prefix}_{_PROM_NAME_RE.sub('_', name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in sorted(by_name[name]):
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{metric}{{{label_text}}} {value:g}" if label_text else f"{metric} {value:g}")
+
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_reports(
+        self,
+        report_path: Optional[str] = None,
+        textfile_path: Optional[str] = None,
+    ) -> None:
+        """Write the JSON run report and, if configured, the Prometheus textfile."""
+        if not self.enabled:
+            return
+
+        report_path = report_path or METRICS_REPORT_PATH
+        textfile_path = textfile_path or METRICS_TEXTFILE_PATH
+
+        with open(report_path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+            f.write("\n")
+        print(f"[METRICS] Run report written to {report_path}")
+
+        if textfile_path:
+            # Write then rename so the exporter never reads a partial file
+            tmp_path = f"{textfile_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, textfile_path)
+
+
+metrics = Metrics(enabled=METRICS_ENABLED)
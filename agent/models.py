@@ -3,7 +3,7 @@ Data models for the agent.
 Contains all dataclasses, enums, and the proposal factory.
 """
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from datetime import datetime
 from enum import Enum
 
@@ -20,6 +20,16 @@ class SchemaSection(str, Enum):
     OPERATIONAL_UNDERSTANDING = "operational_understanding"
 
 
+class IngestionOutcome(str, Enum):
+    """Terminal result of running one article through the pipeline."""
+    TOPIC_PROPOSED = "topic_proposed"
+    MEMORY_UPDATE_PROPOSED = "memory_update_proposed"
+    NO_NEW_TOPIC = "no_new_topic"
+    NO_UPDATE = "no_update"
+    FORMAT_FAILURE = "format_failure"
+    MEMORY_MISSING = "memory_missing"
+
+
 # =============================================================================
 # TOPIC MEMORY
 # =============================================================================
@@ -39,6 +49,28 @@ class TopicMemory:
     last_updated_ts: Optional[datetime] = None
 
 
+# =============================================================================
+# TOPIC CATALOG
+# =============================================================================
+
+@dataclass(frozen=True)
+class TopicCatalogView:
+    """Prebuilt, read-only view of one vertical's topics for prompt building."""
+    vertical: str
+    topics: Tuple[Dict, ...]
+    topic_ids: FrozenSet[str]
+    topic_names: Tuple[str, ...]
+
+    @classmethod
+    def build(cls, vertical: str, topics: List[Dict]) -> "TopicCatalogView":
+        return cls(
+            vertical=vertical,
+            topics=tuple(topics),
+            topic_ids=frozenset(t["id"] for t in topics),
+            topic_names=tuple(t["name"] for t in topics),
+        )
+
+
 # =============================================================================
 # PROPOSALS
 # =============================================================================
@@ -2,69 +2,67 @@
 Main article ingestion pipeline.
 Orchestrates routing, memory updates, and proposal notifications.
 """
+import sys
+from typing import Optional, Tuple
+
+from agent.catalog import topic_catalog
 from agent.config import model
 from agent.db import (
-    fetch_topics_by_vertical,
     load_topic_memory,
     log_pending_proposal,
-    get_pending_id_for_proposal,
 )
 from agent.routing import route_article_to_topic, build_topic_proposal
-from agent.memory import identify_candidate_sections, select_schema_section, build_memory_update
-from agent.ui.telegram.handlers import send_proposal_notification
+from agent.memory import (
+    MEMORY_UPDATE_MODE,
+    identify_candidate_sections,
+    select_schema_section,
+    build_memory_update,
+    build_fused_memory_update,
+)
+from agent.metrics import metrics
+from agent.models import IngestionOutcome
+from agent.prompt_budget import serialize_topic_memory
 
 
-def run_article_ingestion(
-    article_text: str,
-    vertical: str,
-    source_link: str,
-) -> None:
-    """End-to-end ingestion for a single article."""
+def send_proposal_notification(proposal, pending_id: str) -> None:
+    """Notify reviewers. The Telegram stack is only imported once there is something to send."""
+    from agent.ui.telegram.handlers import send_proposal_notification as send
+    send(proposal, pending_id)
 
-    # 1. Route to existing topic
-    topic_id, _ = route_article_to_topic(
-        article_text=article_text,
-        vertical=vertical,
-        model=model,
-    )
 
-    # 2. If no topic match, consider new topic proposal
-    if topic_id is None:
-        existing_topics = [t["name"] for t in fetch_topics_by_vertical(vertical)]
+def flush_notifications() -> None:
+    """Wait for queued reviewer notifications to be sent; no-op if none were queued."""
+    handlers = sys.modules.get("agent.ui.telegram.handlers")
+    if handlers is not None:
+        handlers.flush_notifications()
 
-        topic_proposal = build_topic_proposal(
-            article_text=article_text,
-            vertical=vertical,
-            existing_topics=existing_topics,
-            source_link=source_link,
-            model=model,
-        )
 
-        if topic_proposal:
-            log_pending_proposal(topic_proposal)
-            pending_id = get_pending_id_for_proposal(topic_proposal)
+def _log_and_notify(proposal) -> str:
+    """
+    Log a proposal as pending and notify reviewers; returns the pending id.
+    Raises if the proposal was not stored, so the article is not recorded
+    as processed and is retried.
+    """
+    with metrics.span("ingest.log_pending"):
+        pending_id = log_pending_proposal(proposal)
 
-            if pending_id is None:
-                print(f"Error: Could not find pending_id for source_link: {topic_proposal.source_link}")
-                return
-
-            send_proposal_notification(topic_proposal, pending_id)
-
-        return
+    if pending_id is None:
+        raise RuntimeError(f"Insert returned no pending_id for source_link: {proposal.source_link}")
 
-    # 3. Load topic memory
-    topic_memory = load_topic_memory(topic_id)
-    if topic_memory is None:
-        print("Topic exists but topic memory missing.")
-        return
+    with metrics.span("ingest.notify"):
+        send_proposal_notification(proposal, pending_id)
+    return pending_id
 
-    # 4. Heuristic section detection
-    candidate_sections = identify_candidate_sections(article_text)
 
-    if not candidate_sections:
-        # No sections matched → try proposing a NEW TOPIC instead
-        existing_topics = [t["name"] for t in fetch_topics_by_vertical(vertical)]
+def _propose_new_topic(
+    article_text: str,
+    vertical: str,
+    source_link: str,
+    catalog_view,
+) -> IngestionOutcome:
+    existing_topics = list(catalog_view.topic_names)
 
+    with metrics.span("ingest.new_topic"):
         topic_proposal = build_topic_proposal(
             article_text=article_text,
             vertical=vertical,
@@ -73,46 +71,131 @@ def run_article_ingestion(
             model=model,
         )
 
-        if topic_proposal:
-            log_pending_proposal(topic_proposal)
-            pending_id = get_pending_id_for_proposal(topic_proposal)
+    if topic_proposal:
+        _log_and_notify(topic_proposal)
+        return IngestionOutcome.TOPIC_PROPOSED
 
-            if pending_id is None:
-                print("Error: Could not find pending_id for topic proposal")
-                return
+    return IngestionOutcome.NO_NEW_TOPIC
 
-            send_proposal_notification(topic_proposal, pending_id)
 
-        return
+def run_article_ingestion(
+    article_text: str,
+    vertical: str,
+    source_link: str,
+    route: Optional[Tuple[Optional[str], str]] = None,
+    memory_update_mode: Optional[str] = None,
+) -> IngestionOutcome:
+    """
+    End-to-end ingestion for a single article.
+    Returns the terminal outcome so the caller can record it.
+
+    `route` is a (topic_id, reason) already computed by batch routing;
+    when omitted the article is routed on its own. `memory_update_mode`
+    ("two_step" or "fused") overrides MEMORY_UPDATE_MODE for this call.
+    """
+    with metrics.span("ingest.total"):
+        outcome = _run_article_ingestion(
+            article_text, vertical, source_link, route, memory_update_mode
+        )
+    metrics.incr("ingest_outcomes", outcome=outcome.value)
+    return outcome
 
-    # 5. LLM selects exact section
-    chosen_section, justification = select_schema_section(
-        article_text=article_text,
-        candidate_sections=candidate_sections,
-        topic_memory_text=str(topic_memory),
-        model=model,
-    )
 
-    if chosen_section is None or chosen_section == "NO_UPDATE":
-        print("No meaningful memory update detected.")
-        return
+def _run_article_ingestion(
+    article_text: str,
+    vertical: str,
+    source_link: str,
+    route: Optional[Tuple[Optional[str], str]],
+    memory_update_mode: Optional[str],
+) -> IngestionOutcome:
+    # Topics for the vertical are loaded once per run and shared by every prompt
+    with metrics.span("ingest.catalog"):
+        catalog_view = topic_catalog.view(vertical)
 
-    # 6. Build memory update proposal
-    proposal = build_memory_update(
-        topic_memory=topic_memory,
-        chosen_section=chosen_section,
-        justification=justification,
-        article_text=article_text,
-        source_link=source_link,
-        model=model,
-    )
+    # 1. Route to existing topic
+    if route is None:
+        with metrics.span("ingest.route"):
+            route = route_article_to_topic(
+                article_text=article_text,
+                vertical=vertical,
+                model=model,
+                catalog_view=catalog_view,
+            )
+    topic_id, _ = route
 
-    # 7. Log and notify
-    log_pending_proposal(proposal)
-    pending_id = get_pending_id_for_proposal(proposal)
+    # 2. If no topic match, consider new topic proposal
+    if topic_id is None:
+        return _propose_new_topic(article_text, vertical, source_link, catalog_view)
 
-    if pending_id is None:
-        print(f"Error: Could not find pending_id for source_link: {proposal.source_link}")
-        return
+    # 3. Load topic memory
+    with metrics.span("ingest.load_memory"):
+        topic_memory = load_topic_memory(topic_id)
+    if topic_memory is None:
+        print("Topic exists but topic memory missing.")
+        return IngestionOutcome.MEMORY_MISSING
 
-    send_proposal_notification(proposal, pending_id)
+    # 4. Heuristic section detection
+    with metrics.span("ingest.candidate_sections"):
+        candidate_sections = identify_candidate_sections(article_text)
+
+    if not candidate_sections:
+        # No sections matched → try proposing a NEW TOPIC instead
+        return _propose_new_topic(article_text, vertical, source_link, catalog_view)
+
+    memory_update_mode = memory_update_mode or MEMORY_UPDATE_MODE
+
+    if memory_update_mode == "fused":
+        # 5-6. LLM selects the section and rewrites it in one call
+        with metrics.span("ingest.fused_update"):
+            proposal, justification = build_fused_memory_update(
+                topic_memory=topic_memory,
+                candidate_sections=candidate_sections,
+                article_text=article_text,
+                source_link=source_link,
+                model=model,
+            )
+
+        if proposal is None:
+            if justification == "NO_UPDATE":
+                print("No meaningful memory update detected.")
+                return IngestionOutcome.NO_UPDATE
+
+            print(f"Fused memory update failed: {justification}")
+            return IngestionOutcome.FORMAT_FAILURE
+
+    else:
+        # 5. LLM selects exact section
+        with metrics.span("ingest.select_section"):
+            chosen_section, justification = select_schema_section(
+                article_text=article_text,
+                candidate_sections=candidate_sections,
+                topic_memory_text=serialize_topic_memory(topic_memory),
+                model=model,
+            )
+
+        if chosen_section is None:
+            print(f"Section selection failed: {justification}")
+            return IngestionOutcome.FORMAT_FAILURE
+
+        if chosen_section == "NO_UPDATE":
+            print("No meaningful memory update detected.")
+            return IngestionOutcome.NO_UPDATE
+
+        # 6. Build memory update proposal
+        try:
+            with metrics.span("ingest.rewrite"):
+                proposal = build_memory_update(
+                    topic_memory=topic_memory,
+                    chosen_section=chosen_section,
+                    justification=justification,
+                    article_text=article_text,
+                    source_link=source_link,
+                    model=model,
+                )
+        except ValueError as e:
+            print(f"Memory rewrite failed: {e}")
+            return IngestionOutcome.FORMAT_FAILURE
+
+    # 7. Log and notify
+    _log_and_notify(proposal)
+    return IngestionOutcome.MEMORY_UPDATE_PROPOSED
@@ -0,0 +1,114 @@
+"""
+Prompt budgeting.
+Token counting, per-field budgets and truncation so prompt size stays bounded
+regardless of topic age, catalog size or feed summary length.
+"""
+import os
+import re
+from typing import Iterable, List, Optional
+
+from agent.models import SchemaSection, TopicMemory
+
+
+# =============================================================================
+# BUDGETS (tokens)
+# =============================================================================
+
+PROMPT_BUDGETS = {
+    "article_text": int(os.getenv("PROMPT_ARTICLE_TOKENS", "1500")),
+    "batch_article_text": int(os.getenv("PROMPT_BATCH_ARTICLE_TOKENS", "500")),
+    "topics_block": int(os.getenv("PROMPT_TOPICS_TOKENS", "2000")),
+    "topic_memory": int(os.getenv("PROMPT_TOPIC_MEMORY_TOKENS", "1500")),
+    "section_belief": int(os.getenv("PROMPT_SECTION_TOKENS", "500")),
+}
+
+_CHARS_PER_TOKEN = 4
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_SENTENCE_END_RE = re.compile(r"[.!?]\s")
+_ELLIPSIS = " […] "
+
+
+# =============================================================================
+# COUNTING
+# =============================================================================
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token for English text)."""
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+# =============================================================================
+# TRUNCATION
+# =============================================================================
+
+def clean_text(text: str) -> str:
+    """Strip HTML tags and collapse whitespace (feed summaries are often HTML)."""
+    return _SPACE_RE.sub(" ", _TAG_RE.sub(" ", text or "")).strip()
+
+
+def truncate_text(text: str, max_tokens: int, tail_fraction: float = 0.2) -> str:
+    """
+    Fit text into max_tokens, keeping the head and a short tail.
+    Cuts are moved back to the nearest sentence end when one is close.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget_chars = max(max_tokens * _CHARS_PER_TOKEN - len(_ELLIPSIS), 0)
+    tail_chars = int(budget_chars * tail_fraction)
+    head_chars = budget_chars - tail_chars
+
+    head = text[:head_chars]
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(head)]
+    if ends and ends[-1] >= head_chars * 0.7:
+        head = head[:ends[-1]]
+
+    tail = text[len(text) - tail_chars:] if tail_chars else ""
+    starts = [m.end() for m in _SENTENCE_END_RE.finditer(tail)]
+    if starts and starts[0] <= tail_chars * 0.3:
+        tail = tail[starts[0]:]
+
+    return head.rstrip() + _ELLIPSIS + tail.lstrip()
+
+
+def fit_article(article_text: str, field: str = "article_text") -> str:
+    """Clean and truncate article text to its prompt budget."""
+    return truncate_text(clean_text(article_text), PROMPT_BUDGETS[field])
+
+
+def fit_lines(lines: Iterable[str], max_tokens: int) -> List[str]:
+    """Keep leading lines while they fit; lines should be ordered by priority."""
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = count_tokens(line)
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+# =============================================================================
+# TOPIC MEMORY SERIALIZATION
+# =============================================================================
+
+def serialize_topic_memory(
+    topic_memory: TopicMemory,
+    sections: Optional[List[str]] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Compact "section: belief" text for prompts.
+    Excludes progress history and metadata; each section gets an equal
+    share of the budget (capped at the per-section budget).
+    """
+    sections = sections or [s.value for s in SchemaSection]
+    max_tokens = max_tokens or PROMPT_BUDGETS["topic_memory"]
+    per_section = min(PROMPT_BUDGETS["section_belief"], max_tokens // max(len(sections), 1))
+
+    return "\n".join(
+        f"{section}: {truncate_text(clean_text(getattr(topic_memory, section)), per_section)}"
+        for section in sections
+    )
@@ -2,11 +2,20 @@
 Topic routing logic.
 Handles routing articles to existing topics or proposing new topics.
 """
-from typing import Optional, Tuple, Set, List
+from typing import Dict, Optional, Tuple, Set, List
 from langchain_core.messages import SystemMessage, HumanMessage
 
-from agent.db import fetch_topics_by_vertical
-from agent.models import TopicRoutingProposal
+from agent.catalog import topic_catalog
+from agent.llm_cache import discard_response
+from agent.models import TopicRoutingProposal, TopicCatalogView
+from agent.prompt_budget import PROMPT_BUDGETS, fit_article, fit_lines
+from agent.topic_index import (
+    topic_index,
+    ROUTING_SHORTLIST_SIZE,
+    ROUTE_ACCEPT_SIMILARITY,
+    ROUTE_ACCEPT_MARGIN,
+    ROUTE_REJECT_SIMILARITY,
+)
 
 
 # =============================================================================
@@ -37,6 +46,32 @@ REASON: <1 sentence justification>
 """
 
 
+BATCH_TOPIC_ROUTING_PROMPT = """
+You are a research router.
+
+You will be given:
+1) A list of topics (ALL from the same vertical)
+2) Several numbered articles
+
+Your task, for EACH article independently:
+- Choose the SINGLE most relevant topic
+- If none are clearly relevant, respond with NO_TOPIC
+
+Rules:
+- Answer every article, in order, using its number
+- You MUST return at most one topic per article
+- Be conservative — only choose if relevance is strong
+- Do NOT invent topics
+- Do NOT explain the articles
+
+Output format (follow exactly, one block per article):
+
+ARTICLE: <article_number>
+TOPIC_ID: <topic_id_or_NO_TOPIC>
+REASON: <1 sentence justification>
+"""
+
+
 NEW_TOPIC_PROMPT = """
 You are organizing research topics within a single vertical.
 
@@ -77,6 +112,9 @@ REASON: <1–2 sentence justification>
 # ROUTE TO EXISTING TOPIC
 # =============================================================================
 
+# Reasons parse_topic_routing_response gives for answers it could not use
+_MALFORMED_ROUTING = ("Invalid routing format.", "Invalid topic selected.")
+
 def parse_topic_routing_response(
     llm_text: str,
     valid_topic_ids: Set[str],
@@ -102,44 +140,239 @@ def parse_topic_routing_response(
     return topic_id, reason
 
 
+def _local_route_decision(
+    shortlist: List[Tuple[str, float]],
+    catalog_view: TopicCatalogView,
+) -> Optional[Tuple[Optional[str], str]]:
+    """
+    Decide from local similarity alone, or return None to ask the LLM.
+
+    Both shortcuts are off unless configured, and only trusted once the
+    topics involved have researched memory indexed: a new topic's index
+    entry is little more than its name, so low or high similarity to it
+    says little about the article.
+    """
+    top_score = shortlist[0][1] if shortlist else 0.0
+    runner_up = shortlist[1][1] if len(shortlist) > 1 else 0.0
+
+    if (
+        ROUTE_REJECT_SIMILARITY is not None
+        and top_score < ROUTE_REJECT_SIMILARITY
+        and topic_index.has_memory(catalog_view.vertical, catalog_view.topic_ids)
+    ):
+        return None, f"No topic is similar (best similarity {top_score:.2f})."
+
+    if (
+        ROUTE_ACCEPT_SIMILARITY is not None
+        and top_score >= ROUTE_ACCEPT_SIMILARITY
+        and top_score - runner_up >= ROUTE_ACCEPT_MARGIN
+        and topic_index.has_memory(catalog_view.vertical, [shortlist[0][0]])
+    ):
+        return shortlist[0][0], f"Decisive local similarity match ({top_score:.2f})."
+
+    return None
+
+
+def _ranked_topic_ids(catalog_view: TopicCatalogView, scores: Dict[str, float]) -> List[str]:
+    """
+    Topic ids to show the router, most similar first so prompt truncation
+    drops the weakest. Verticals within ROUTING_SHORTLIST_SIZE show every
+    topic; larger ones only the shortlisted (scored) ones.
+    """
+    if len(catalog_view.topics) <= ROUTING_SHORTLIST_SIZE:
+        topic_ids = [t["id"] for t in catalog_view.topics]
+    else:
+        topic_ids = list(scores)
+    return sorted(topic_ids, key=lambda topic_id: -scores.get(topic_id, 0.0))
+
+
+def _topics_block(catalog_view: TopicCatalogView, topic_ids: List[str]) -> str:
+    names = {t["id"]: t["name"] for t in catalog_view.topics}
+    return "\n".join(fit_lines(
+        (f"- {topic_id}: {names[topic_id]}" for topic_id in topic_ids),
+        PROMPT_BUDGETS["topics_block"],
+    ))
+
+
 def route_article_to_topic(
     article_text: str,
     vertical: str,
     model,
+    catalog_view: Optional[TopicCatalogView] = None,
 ) -> Tuple[Optional[str], str]:
-    """Route an article to an existing topic, or return None if no match."""
-    topics = fetch_topics_by_vertical(vertical)
+    """
+    Route an article to an existing topic, or return None if no match.
+
+    A local TF-IDF shortlist limits the prompt to the most similar topics.
+    If configured, decisively high or low similarity skips the LLM.
+    """
+    catalog_view = catalog_view or topic_catalog.view(vertical)
 
-    if not topics:
+    if not catalog_view.topics:
         return None, "No topics available for this vertical."
 
-    topics_block = "\n".join([
-        f"- {t['id']}: {t['name']}"
-        for t in topics
-    ])
+    shortlist = topic_index.shortlist(catalog_view, article_text)
+    decision = _local_route_decision(shortlist, catalog_view)
+    if decision is not None:
+        return decision
+
+    ranked_ids = _ranked_topic_ids(catalog_view, dict(shortlist))
+    if not ranked_ids:
+        return None, "No topic is similar."
+    shortlisted_ids = set(ranked_ids)
 
     prompt = EXISTING_TOPIC_ROUTING_PROMPT + f"""
 
 Topics:
-{topics_block}
+{_topics_block(catalog_view, ranked_ids)}
 
 Article:
-{article_text}
+{fit_article(article_text)}
 """
 
-    response = model.invoke([
+    messages = [
         SystemMessage(content="You are a careful research router."),
         HumanMessage(content=prompt),
-    ])
+    ]
+    response = model.invoke(messages)
 
     topic_id, reason = parse_topic_routing_response(
         response.content,
-        valid_topic_ids={t["id"] for t in topics},
+        valid_topic_ids=shortlisted_ids,
     )
+    if topic_id is None and reason in _MALFORMED_ROUTING:
+        discard_response(model, messages)
 
     return topic_id, reason
 
 
+# =============================================================================
+# BATCH ROUTING
+# =============================================================================
+
+def parse_batch_routing_response(
+    llm_text: str,
+    article_count: int,
+    valid_topic_ids: Set[str],
+) -> Dict[int, Tuple[Optional[str], str]]:
+    """
+    Parse per-article answers from a batch routing response.
+    Returns only the article numbers (1-based) whose block is well formed.
+    """
+    blocks: Dict[int, List[str]] = {}
+    current: Optional[int] = None
+
+    for line in llm_text.strip().splitlines():
+        line = line.strip()
+        if line.startswith("ARTICLE:"):
+            try:
+                current = int(line.replace("ARTICLE:", "").strip())
+            except ValueError:
+                current = None
+                continue
+            # A repeated article number is ambiguous; drop both answers
+            if current in blocks:
+                blocks[current] = []
+                current = None
+                continue
+            blocks[current] = []
+        elif current is not None:
+            blocks[current].append(line)
+
+    results: Dict[int, Tuple[Optional[str], str]] = {}
+    for number, lines in blocks.items():
+        if not 1 <= number <= article_count or not lines:
+            continue
+
+        topic_id, reason = parse_topic_routing_response("\n".join(lines), valid_topic_ids)
+        if topic_id is None and reason in _MALFORMED_ROUTING:
+            continue
+        results[number] = (topic_id, reason)
+
+    return results
+
+
+def route_articles_to_topics(
+    article_texts: List[str],
+    vertical: str,
+    model,
+    catalog_view: Optional[TopicCatalogView] = None,
+) -> List[Tuple[Optional[str], str]]:
+    """
+    Route several articles from one vertical with a single LLM call.
+
+    Articles decided by local similarity skip the call. Articles whose
+    batch answer is missing or malformed fall back to route_article_to_topic.
+    Results are returned in input order.
+    """
+    catalog_view = catalog_view or topic_catalog.view(vertical)
+
+    if not catalog_view.topics:
+        return [(None, "No topics available for this vertical.")] * len(article_texts)
+
+    results: List[Optional[Tuple[Optional[str], str]]] = [None] * len(article_texts)
+    pending: List[int] = []
+    # Best similarity of each shortlisted topic to any pending article
+    scores: Dict[str, float] = {}
+    small_vertical = len(catalog_view.topics) <= ROUTING_SHORTLIST_SIZE
+
+    for i, article_text in enumerate(article_texts):
+        shortlist = topic_index.shortlist(catalog_view, article_text)
+        decision = _local_route_decision(shortlist, catalog_view)
+        if decision is not None:
+            results[i] = decision
+        elif not shortlist and not small_vertical:
+            results[i] = (None, "No topic is similar.")
+        else:
+            pending.append(i)
+            for topic_id, score in shortlist:
+                scores[topic_id] = max(score, scores.get(topic_id, 0.0))
+
+    if len(pending) == 1:
+        i = pending[0]
+        results[i] = route_article_to_topic(article_texts[i], vertical, model, catalog_view)
+        pending = []
+
+    if pending:
+        ranked_ids = _ranked_topic_ids(catalog_view, scores)
+        shortlisted_ids = set(ranked_ids)
+
+        articles_block = "\n\n".join(
+            f"ARTICLE {number}:\n{fit_article(article_texts[i], 'batch_article_text')}"
+            for number, i in enumerate(pending, start=1)
+        )
+        prompt = BATCH_TOPIC_ROUTING_PROMPT + f"""
+
+Topics:
+{_topics_block(catalog_view, ranked_ids)}
+
+Articles:
+{articles_block}
+"""
+
+        messages = [
+            SystemMessage(content="You are a careful research router."),
+            HumanMessage(content=prompt),
+        ]
+        response = model.invoke(messages)
+
+        answers = parse_batch_routing_response(
+            response.content,
+            article_count=len(pending),
+            valid_topic_ids=shortlisted_ids,
+        )
+        if len(answers) < len(pending):
+            discard_response(model, messages)
+
+        for number, i in enumerate(pending, start=1):
+            if number in answers:
+                results[i] = answers[number]
+            else:
+                results[i] = route_article_to_topic(article_texts[i], vertical, model, catalog_view)
+
+    return results
+
+
 # =============================================================================
 # PROPOSE NEW TOPIC
 # =============================================================================
@@ -154,14 +387,17 @@ def build_topic_proposal(
     """Propose a new topic if the article doesn't fit existing ones."""
     prompt = NEW_TOPIC_PROMPT.format(
         vertical=vertical,
-        existing_topics=existing_topics,
-        article_text=article_text,
+        existing_topics="\n".join(
+            fit_lines((f"- {name}" for name in existing_topics), PROMPT_BUDGETS["topics_block"])
+        ),
+        article_text=fit_article(article_text),
     )
 
-    response = model.invoke([
+    messages = [
         SystemMessage(content="You are a careful research organizer."),
         HumanMessage(content=prompt),
-    ])
+    ]
+    response = model.invoke(messages)
 
     decision = None
     topic_name = None
@@ -187,4 +423,5 @@ def build_topic_proposal(
             source_link=source_link,
         )
 
+    discard_response(model, messages)
     return None
@@ -0,0 +1,398 @@
+"""
+Local SQLite storage backend.
+Same tables as the Supabase schema, for offline runs, benchmarks and single-node deployments.
+"""
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from agent.storage import Storage
+
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_MAX_PARAMS = 999
+_IN_CHUNK_SIZE = 500
+# fetch_seen_sources binds each link three times, plus the cutoff
+_SEEN_CHUNK_SIZE = (_MAX_PARAMS - 1) // 3
+
+_PROPOSAL_COLUMNS = [
+    "proposal_type",
+    "suggested_topic_name",
+    "vertical",
+    "confidence_reason",
+    "topic_id",
+    "schema_section",
+    "old_belief",
+    "new_belief",
+    "why_this_matters",
+    "source_link",
+]
+
+_REJECTED_COLUMNS = [
+    "proposal_type",
+    "topic_id",
+    "schema_section",
+    "proposed_belief",
+    "why_this_matters",
+    "source_link",
+    "rejection_reason",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    vertical TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS topics_vertical ON topics (vertical);
+
+CREATE TABLE IF NOT EXISTS topic_memory (
+    topic_id TEXT PRIMARY KEY REFERENCES topics (id),
+    predecessors_limitations TEXT,
+    core_proposal TEXT,
+    enabling_conditions TEXT,
+    problems_solved TEXT,
+    operational_understanding TEXT,
+    last_updated_ts TEXT
+);
+
+CREATE TABLE IF NOT EXISTS topic_progress_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    source TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS topic_progress_history_topic
+    ON topic_progress_history (topic_id, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS pending_proposals (
+    id TEXT PRIMARY KEY,
+    proposal_type TEXT NOT NULL,
+    suggested_topic_name TEXT,
+    vertical TEXT,
+    confidence_reason TEXT,
+    topic_id TEXT,
+    schema_section TEXT,
+    old_belief TEXT,
+    new_belief TEXT,
+    why_this_matters TEXT,
+    source_link TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pending_proposals_created ON pending_proposals (created_at);
+CREATE INDEX IF NOT EXISTS pending_proposals_vertical ON pending_proposals (vertical);
+CREATE INDEX IF NOT EXISTS pending_proposals_topic ON pending_proposals (topic_id);
+CREATE INDEX IF NOT EXISTS pending_proposals_source ON pending_proposals (source_link);
+
+CREATE TABLE IF NOT EXISTS accepted_proposals (
+    id TEXT PRIMARY KEY,
+    proposal_type TEXT NOT NULL,
+    suggested_topic_name TEXT,
+    vertical TEXT,
+    confidence_reason TEXT,
+    topic_id TEXT,
+    schema_section TEXT,
+    old_belief TEXT,
+    new_belief TEXT,
+    why_this_matters TEXT,
+    source_link TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS accepted_proposals_source ON accepted_proposals (source_link);
+CREATE INDEX IF NOT EXISTS accepted_proposals_topic ON accepted_proposals (topic_id);
+
+CREATE TABLE IF NOT EXISTS rejected_proposals (
+    id TEXT PRIMARY KEY,
+    proposal_type TEXT,
+    topic_id TEXT,
+    schema_section TEXT,
+    proposed_belief TEXT,
+    why_this_matters TEXT,
+    source_link TEXT,
+    rejection_reason TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rejected_proposals_source ON rejected_proposals (source_link);
+CREATE INDEX IF NOT EXISTS rejected_proposals_topic ON rejected_proposals (topic_id);
+
+CREATE TABLE IF NOT EXISTS processed_sources (
+    source_link TEXT PRIMARY KEY,
+    outcome TEXT NOT NULL,
+    processed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS processed_sources_processed_at ON processed_sources (processed_at);
+"""
+
+_MEMORY_COLUMNS = {
+    "topic_id",
+    "predecessors_limitations",
+    "core_proposal",
+    "enabling_conditions",
+    "problems_solved",
+    "operational_understanding",
+    "last_updated_ts",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _checked_columns(columns: List[str]) -> str:
+    unknown = set(columns) - _MEMORY_COLUMNS
+    if unknown:
+        raise ValueError(f"Unknown topic_memory columns: {sorted(unknown)}")
+    return ", ".join(columns)
+
+
+class SQLiteStorage(Storage):
+    """
+    Storage in a single SQLite file (":memory:" for a throwaway database).
+
+    One connection is shared by all threads and serialized with a lock;
+    every method is a single statement or a single transaction.
+    """
+
+    def __init__(self, path: str = "research_agent.sqlite3"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params=()) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _write(self, sql: str, params=()) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).rowcount
+
+    def _insert(self, table: str, columns: List[str], payload: Dict) -> Dict:
+        row = {c: payload.get(c) for c in columns}
+        row["id"] = str(uuid.uuid4())
+        row["created_at"] = _now()
+        placeholders = ", ".join("?" for _ in row)
+        self._write(
+            f"INSERT INTO {table} ({', '.join(row)}) VALUES ({placeholders})",
+            list(row.values()),
+        )
+        return row
+
+    def _insert_many(self, table: str, columns: List[str], payloads: List[Dict]) -> None:
+        if not payloads:
+            return
+        created_at = _now()
+        rows = [
+            [str(uuid.uuid4()), created_at, *(payload.get(c) for c in columns)]
+            for payload in payloads
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO {table} (id, created_at, {', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in range(len(columns) + 2))})",
+                rows,
+            )
+
+    # --- dedup ---------------------------------------------------------------
+
+    def fetch_seen_sources(self, source_links: List[str], processed_since: Optional[str] = None) -> Set[str]:
+        seen: Set[str] = set()
+        since = processed_since or ""
+
+        for start in range(0, len(source_links), _SEEN_CHUNK_SIZE):
+            chunk = source_links[start:start + _SEEN_CHUNK_SIZE]
+            marks = ", ".join("?" for _ in chunk)
+            rows = self._query(
+                f"""
+                SELECT source_link FROM processed_sources
+                    WHERE source_link IN ({marks}) AND processed_at >= ?
+                UNION SELECT source_link FROM accepted_proposals WHERE source_link IN ({marks})
+                UNION SELECT source_link FROM rejected_proposals WHERE source_link IN ({marks})
+                """,
+                [*chunk, since, *chunk, *chunk],
+            )
+            seen.update(row["source_link"] for row in rows)
+
+        return seen
+
+    def upsert_processed_source(self, source_link: str, outcome: str, processed_at: str) -> None:
+        self._write(
+            """
+            INSERT INTO processed_sources (source_link, outcome, processed_at) VALUES (?, ?, ?)
+            ON CONFLICT (source_link) DO UPDATE SET
+                outcome = excluded.outcome, processed_at = excluded.processed_at
+            """,
+            (source_link, outcome, processed_at),
+        )
+
+    # --- proposals -----------------------------------------------------------
+
+    def insert_pending_proposals(self, payloads: List[Dict]) -> List[Dict]:
+        rows = []
+        for payload in payloads:
+            row = {c: payload.get(c) for c in _PROPOSAL_COLUMNS}
+            row["id"] = str(uuid.uuid4())
+            row["created_at"] = _now()
+            rows.append(row)
+        if not rows:
+            return []
+
+        columns = list(rows[0])
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO pending_proposals ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                [[row[c] for c in columns] for row in rows],
+            )
+        return rows
+
+    def fetch_pending_proposals(self) -> List[Dict]:
+        return self._query("SELECT * FROM pending_proposals ORDER BY created_at")
+
+    def fetch_pending_proposal(self, pending_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT * FROM pending_proposals WHERE id = ?", (pending_id,))
+        return rows[0] if rows else None
+
+    def delete_pending_proposal(self, pending_id: str) -> None:
+        self._write("DELETE FROM pending_proposals WHERE id = ?", (pending_id,))
+
+    def insert_accepted_proposal(self, payload: Dict) -> None:
+        self._insert("accepted_proposals", _PROPOSAL_COLUMNS, payload)
+
+    def insert_rejected_proposal(self, payload: Dict) -> None:
+        self._insert("rejected_proposals", _REJECTED_COLUMNS, payload)
+
+    def delete_pending_proposals(self, pending_ids: List[str]) -> None:
+        with self._lock, self._conn:
+            for start in range(0, len(pending_ids), _IN_CHUNK_SIZE):
+                chunk = pending_ids[start:start + _IN_CHUNK_SIZE]
+                self._conn.execute(
+                    f"DELETE FROM pending_proposals WHERE id IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                )
+
+    def insert_accepted_proposals(self, payloads: List[Dict]) -> None:
+        self._insert_many("accepted_proposals", _PROPOSAL_COLUMNS, payloads)
+
+    def insert_rejected_proposals(self, payloads: List[Dict]) -> None:
+        self._insert_many("rejected_proposals", _REJECTED_COLUMNS, payloads)
+
+    # --- topics --------------------------------------------------------------
+
+    def fetch_topics_by_vertical(self, vertical: str) -> List[Dict]:
+        return self._query("SELECT id, name FROM topics WHERE vertical = ?", (vertical,))
+
+    def fetch_topic_verticals(self, topic_ids: List[str]) -> Dict[str, str]:
+        verticals: Dict[str, str] = {}
+        for start in range(0, len(topic_ids), _IN_CHUNK_SIZE):
+            chunk = topic_ids[start:start + _IN_CHUNK_SIZE]
+            rows = self._query(
+                f"SELECT id, vertical FROM topics WHERE id IN ({', '.join('?' for _ in chunk)})",
+                chunk,
+            )
+            verticals.update((row["id"], row["vertical"]) for row in rows)
+        return verticals
+
+    def insert_topic(self, topic_id: str, name: str, vertical: str) -> None:
+        self._write(
+            "INSERT INTO topics (id, name, vertical) VALUES (?, ?, ?)",
+            (topic_id, name, vertical),
+        )
+
+    def insert_topics(self, rows: List[Dict]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO topics (id, name, vertical) VALUES (?, ?, ?)",
+                [(row["id"], row["name"], row["vertical"]) for row in rows],
+            )
+
+    # --- topic memory --------------------------------------------------------
+
+    def fetch_topic_memory(self, topic_id: str, columns: List[str]) -> Optional[Dict]:
+        rows = self._query(
+            f"SELECT {_checked_columns(columns)} FROM topic_memory WHERE topic_id = ?",
+            (topic_id,),
+        )
+        return rows[0] if rows else None
+
+    def fetch_topic_memories(self, topic_ids: List[str], columns: List[str]) -> List[Dict]:
+        selected = _checked_columns(columns)
+        rows: List[Dict] = []
+        for start in range(0, len(topic_ids), _IN_CHUNK_SIZE):
+            chunk = topic_ids[start:start + _IN_CHUNK_SIZE]
+            rows.extend(self._query(
+                f"SELECT {selected} FROM topic_memory "
+                f"WHERE topic_id IN ({', '.join('?' for _ in chunk)})",
+                chunk,
+            ))
+        return rows
+
+    def insert_topic_memory(self, row: Dict) -> None:
+        columns = _checked_columns(list(row))
+        self._write(
+            f"INSERT INTO topic_memory ({columns}) VALUES ({', '.join('?' for _ in row)})",
+            list(row.values()),
+        )
+
+    def insert_topic_memories(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        columns = list(rows[0])
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO topic_memory ({_checked_columns(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                [[row.get(c) for c in columns] for row in rows],
+            )
+
+    def update_topic_memory(self, topic_id: str, values: Dict) -> Optional[Dict]:
+        _checked_columns(list(values))
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self._lock, self._conn:
+            updated = self._conn.execute(
+                f"UPDATE topic_memory SET {assignments} WHERE topic_id = ?",
+                [*values.values(), topic_id],
+            ).rowcount
+            if not updated:
+                return None
+            row = self._conn.execute(
+                "SELECT * FROM topic_memory WHERE topic_id = ?", (topic_id,)
+            ).fetchone()
+        return dict(row)
+
+    def insert_progress_entry(self, row: Dict) -> None:
+        self._write(
+            "INSERT INTO topic_progress_history (topic_id, section, source, created_at) VALUES (?, ?, ?, ?)",
+            (row["topic_id"], row["section"], row.get("source"), row["created_at"]),
+        )
+
+    def insert_progress_entries(self, rows: List[Dict]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO topic_progress_history (topic_id, section, source, created_at) VALUES (?, ?, ?, ?)",
+                [(row["topic_id"], row["section"], row.get("source"), row["created_at"]) for row in rows],
+            )
+
+    def fetch_progress_history(self, topic_id: str, limit: int, offset: int) -> List[Dict]:
+        return self._query(
+            """
+            SELECT section, source, created_at FROM topic_progress_history
+            WHERE topic_id = ? ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?
+            """,
+            (topic_id, limit, offset),
+        )
@@ -0,0 +1,355 @@
+"""
+Storage backends.
+Defines the persistence interface used by agent/db.py and its Supabase implementation.
+Select a backend with STORAGE_BACKEND (supabase | sqlite) or set_storage().
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set
+
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+STORAGE_SQLITE_PATH = os.getenv("STORAGE_SQLITE_PATH", "research_agent.sqlite3")
+
+# Links are sent in the query string, so keep chunks well under URL limits.
+SEEN_LOOKUP_CHUNK_SIZE = 50
+
+
+# =============================================================================
+# INTERFACE
+# =============================================================================
+
+class Storage(ABC):
+    """
+    Row-level persistence for topics, topic memory, proposals and the
+    processed sources ledger. Rows are plain dicts with the Supabase column
+    names; business rules stay in agent/db.py.
+    """
+
+    # --- dedup ---------------------------------------------------------------
+
+    @abstractmethod
+    def fetch_seen_sources(self, source_links: List[str], processed_since: Optional[str] = None) -> Set[str]:
+        """Subset of source_links in the ledger (since processed_since, if set), accepted or rejected."""
+
+    @abstractmethod
+    def upsert_processed_source(self, source_link: str, outcome: str, processed_at: str) -> None:
+        ...
+
+    # --- proposals -----------------------------------------------------------
+
+    @abstractmethod
+    def insert_pending_proposals(self, payloads: List[Dict]) -> List[Dict]:
+        """Insert pending proposals; returns the inserted rows (with id) in input order."""
+
+    @abstractmethod
+    def fetch_pending_proposals(self) -> List[Dict]:
+        """All pending proposals, oldest first."""
+
+    @abstractmethod
+    def fetch_pending_proposal(self, pending_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def delete_pending_proposal(self, pending_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def insert_accepted_proposal(self, payload: Dict) -> None:
+        ...
+
+    @abstractmethod
+    def insert_rejected_proposal(self, payload: Dict) -> None:
+        ...
+
+    @abstractmethod
+    def delete_pending_proposals(self, pending_ids: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    def insert_accepted_proposals(self, payloads: List[Dict]) -> None:
+        ...
+
+    @abstractmethod
+    def insert_rejected_proposals(self, payloads: List[Dict]) -> None:
+        ...
+
+    # --- topics --------------------------------------------------------------
+
+    @abstractmethod
+    def fetch_topics_by_vertical(self, vertical: str) -> List[Dict]:
+        """[{"id", "name"}] for one vertical."""
+
+    @abstractmethod
+    def fetch_topic_verticals(self, topic_ids: List[str]) -> Dict[str, str]:
+        """{topic_id: vertical} for the topics that exist."""
+
+    @abstractmethod
+    def insert_topic(self, topic_id: str, name: str, vertical: str) -> None:
+        ...
+
+    @abstractmethod
+    def insert_topics(self, rows: List[Dict]) -> None:
+        """Insert [{"id", "name", "vertical"}] rows."""
+
+    # --- topic memory --------------------------------------------------------
+
+    @abstractmethod
+    def fetch_topic_memory(self, topic_id: str, columns: List[str]) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def fetch_topic_memories(self, topic_ids: List[str], columns: List[str]) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def insert_topic_memory(self, row: Dict) -> None:
+        ...
+
+    @abstractmethod
+    def insert_topic_memories(self, rows: List[Dict]) -> None:
+        ...
+
+    @abstractmethod
+    def update_topic_memory(self, topic_id: str, values: Dict) -> Optional[Dict]:
+        """Update one topic_memory row; returns the updated row, or None if missing."""
+
+    @abstractmethod
+    def insert_progress_entry(self, row: Dict) -> None:
+        ...
+
+    @abstractmethod
+    def insert_progress_entries(self, rows: List[Dict]) -> None:
+        ...
+
+    @abstractmethod
+    def fetch_progress_history(self, topic_id: str, limit: int, offset: int) -> List[Dict]:
+        """Rows of (section, source, created_at), newest first."""
+
+
+# =============================================================================
+# SUPABASE
+# =============================================================================
+
+def _uniform_rows(payloads: List[Dict]) -> List[Dict]:
+    """Give every row the same keys; PostgREST bulk inserts take one column list."""
+    columns = {key for payload in payloads for key in payload}
+    return [{key: payload.get(key) for key in columns} for payload in payloads]
+
+
+class SupabaseStorage(Storage):
+    """Storage on the Supabase tables described in the README."""
+
+    def __init__(self, client=None):
+        if client is None:
+            from agent.config import supabase as client
+        self.client = client
+
+    def fetch_seen_sources(self, source_links: List[str], processed_since: Optional[str] = None) -> Set[str]:
+        seen: Set[str] = set()
+        remaining = list(source_links)
+
+        # Uses chunked `in` queries instead of one round trip per link
+        for table in ("processed_sources", "accepted_proposals", "rejected_proposals"):
+            for start in range(0, len(remaining), SEEN_LOOKUP_CHUNK_SIZE):
+                chunk = remaining[start:start + SEEN_LOOKUP_CHUNK_SIZE]
+                query = (
+                    self.client
+                    .table(table)
+                    .select("source_link")
+                    .in_("source_link", chunk)
+                )
+                if table == "processed_sources" and processed_since is not None:
+                    query = query.gte("processed_at", processed_since)
+
+                res = query.execute()
+                seen.update(row["source_link"] for row in res.data or [])
+
+            remaining = [link for link in remaining if link not in seen]
+
+        return seen
+
+    def upsert_processed_source(self, source_link: str, outcome: str, processed_at: str) -> None:
+        self.client.table("processed_sources").upsert(
+            {
+                "source_link": source_link,
+                "outcome": outcome,
+                "processed_at": processed_at,
+            },
+            on_conflict="source_link",
+        ).execute()
+
+    def insert_pending_proposals(self, payloads: List[Dict]) -> List[Dict]:
+        res = self.client.table("pending_proposals").insert(_uniform_rows(payloads)).execute()
+        return res.data or []
+
+    def fetch_pending_proposals(self) -> List[Dict]:
+        res = (
+            self.client
+            .table("pending_proposals")
+            .select("*")
+            .order("created_at")
+            .execute()
+        )
+        return res.data or []
+
+    def fetch_pending_proposal(self, pending_id: str) -> Optional[Dict]:
+        res = (
+            self.client
+            .table("pending_proposals")
+            .select("*")
+            .eq("id", pending_id)
+            .maybe_single()
+            .execute()
+        )
+        if res is None:
+            return None
+        return res.data
+
+    def delete_pending_proposal(self, pending_id: str) -> None:
+        self.client.table("pending_proposals").delete().eq("id", pending_id).execute()
+
+    def insert_accepted_proposal(self, payload: Dict) -> None:
+        self.client.table("accepted_proposals").insert(payload).execute()
+
+    def insert_rejected_proposal(self, payload: Dict) -> None:
+        self.client.table("rejected_proposals").insert(payload).execute()
+
+    def delete_pending_proposals(self, pending_ids: List[str]) -> None:
+        for start in range(0, len(pending_ids), SEEN_LOOKUP_CHUNK_SIZE):
+            chunk = pending_ids[start:start + SEEN_LOOKUP_CHUNK_SIZE]
+            self.client.table("pending_proposals").delete().in_("id", chunk).execute()
+
+    def insert_accepted_proposals(self, payloads: List[Dict]) -> None:
+        if payloads:
+            self.client.table("accepted_proposals").insert(_uniform_rows(payloads)).execute()
+
+    def insert_rejected_proposals(self, payloads: List[Dict]) -> None:
+        if payloads:
+            self.client.table("rejected_proposals").insert(_uniform_rows(payloads)).execute()
+
+    def fetch_topics_by_vertical(self, vertical: str) -> List[Dict]:
+        response = (
+            self.client
+            .table("topics")
+            .select("id, name")
+            .eq("vertical", vertical)
+            .execute()
+        )
+        return response.data or []
+
+    def fetch_topic_verticals(self, topic_ids: List[str]) -> Dict[str, str]:
+        verticals: Dict[str, str] = {}
+        for start in range(0, len(topic_ids), SEEN_LOOKUP_CHUNK_SIZE):
+            chunk = topic_ids[start:start + SEEN_LOOKUP_CHUNK_SIZE]
+            res = (
+                self.client
+                .table("topics")
+                .select("id, vertical")
+                .in_("id", chunk)
+                .execute()
+            )
+            verticals.update((row["id"], row["vertical"]) for row in res.data or [])
+        return verticals
+
+    def insert_topic(self, topic_id: str, name: str, vertical: str) -> None:
+        self.client.table("topics").insert({
+            "id": topic_id,
+            "name": name,
+            "vertical": vertical
+        }).execute()
+
+    def insert_topics(self, rows: List[Dict]) -> None:
+        if rows:
+            self.client.table("topics").insert(rows).execute()
+
+    def fetch_topic_memory(self, topic_id: str, columns: List[str]) -> Optional[Dict]:
+        response = (
+            self.client
+            .table("topic_memory")
+            .select(", ".join(columns))
+            .eq("topic_id", topic_id)
+            .maybe_single()
+            .execute()
+        )
+        if response is None:
+            return None
+        return response.data
+
+    def fetch_topic_memories(self, topic_ids: List[str], columns: List[str]) -> List[Dict]:
+        rows: List[Dict] = []
+        for start in range(0, len(topic_ids), SEEN_LOOKUP_CHUNK_SIZE):
+            chunk = topic_ids[start:start + SEEN_LOOKUP_CHUNK_SIZE]
+            res = (
+                self.client
+                .table("topic_memory")
+                .select(", ".join(columns))
+                .in_("topic_id", chunk)
+                .execute()
+            )
+            rows.extend(res.data or [])
+        return rows
+
+    def insert_topic_memory(self, row: Dict) -> None:
+        self.client.table("topic_memory").insert(row).execute()
+
+    def insert_topic_memories(self, rows: List[Dict]) -> None:
+        if rows:
+            self.client.table("topic_memory").insert(rows).execute()
+
+    def update_topic_memory(self, topic_id: str, values: Dict) -> Optional[Dict]:
+        res = self.client.table("topic_memory") \
+            .update(values) \
+            .eq("topic_id", topic_id) \
+            .execute()
+        return res.data[0] if res.data else None
+
+    def insert_progress_entry(self, row: Dict) -> None:
+        self.client.table("topic_progress_history").insert(row).execute()
+
+    def insert_progress_entries(self, rows: List[Dict]) -> None:
+        if rows:
+            self.client.table("topic_progress_history").insert(rows).execute()
+
+    def fetch_progress_history(self, topic_id: str, limit: int, offset: int) -> List[Dict]:
+        res = (
+            self.client
+            .table("topic_progress_history")
+            .select("section, source, created_at")
+            .eq("topic_id", topic_id)
+            .order("created_at", desc=True)
+            .range(offset, offset + limit - 1)
+            .execute()
+        )
+        return res.data or []
+
+
+# =============================================================================
+# BACKEND SELECTION
+# =============================================================================
+
+_storage: Optional[Storage] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    """The process-wide storage backend, created on first use from STORAGE_BACKEND."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == "sqlite":
+                from agent.sqlite_storage import SQLiteStorage
+                _storage = SQLiteStorage(STORAGE_SQLITE_PATH)
+            elif STORAGE_BACKEND == "supabase":
+                _storage = SupabaseStorage()
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        return _storage
+
+
+def set_storage(storage: Optional[Storage]) -> None:
+    """Override the storage backend (e.g. a SQLiteStorage for benchmarks). None resets it."""
+    global _storage
+    with _storage_lock:
+        _storage = storage
@@ -0,0 +1,189 @@
+"""
+Local TF-IDF index of topics for shortlisting before the LLM router.
+CPU-only, in-process, and updated incrementally as topics and their memory change.
+"""
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from agent.models import TopicCatalogView
+
+
+ROUTING_SHORTLIST_SIZE = int(os.getenv("ROUTING_SHORTLIST_SIZE", "20"))
+# Route without the LLM when the best topic is at least this similar and
+# ahead of the runner-up by ROUTE_ACCEPT_MARGIN. Unset = always ask the LLM.
+_accept = os.getenv("ROUTE_ACCEPT_SIMILARITY")
+ROUTE_ACCEPT_SIMILARITY: Optional[float] = float(_accept) if _accept else None
+ROUTE_ACCEPT_MARGIN = float(os.getenv("ROUTE_ACCEPT_MARGIN", "0.25"))
+# Treat the article as matching no topic, without the LLM, below this.
+# Unset = always ask the LLM.
+_reject = os.getenv("ROUTE_REJECT_SIMILARITY")
+ROUTE_REJECT_SIMILARITY: Optional[float] = float(_reject) if _reject else None
+
+# Topic names are short but decisive, so they count more than memory text
+_NAME_WEIGHT = 3
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or "
+    "that the their this to was were will with we our not yet researched".split()
+)
+
+
+def _terms(text: str) -> List[str]:
+    words = [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class TopicIndex:
+    """Inverted TF-IDF index over one vertical's topics."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Counter] = {}
+        self._names: Dict[str, str] = {}
+        self._with_memory: Set[str] = set()
+        self._norms: Dict[str, float] = {}
+        self._dirty = True
+
+    def __contains__(self, topic_id: str) -> bool:
+        return topic_id in self._doc_terms
+
+    def name(self, topic_id: str) -> str:
+        return self._names[topic_id]
+
+    def has_memory(self, topic_id: str) -> bool:
+        """True if the topic has researched memory text indexed, not just its name."""
+        return topic_id in self._with_memory
+
+    def upsert(self, topic_id: str, name: str, memory_text: str = "") -> None:
+        """Add a topic or replace its indexed text."""
+        self.remove(topic_id)
+
+        counts = Counter(_terms(memory_text))
+        if counts:
+            self._with_memory.add(topic_id)
+        for term in _terms(name):
+            counts[term] += _NAME_WEIGHT
+
+        self._doc_terms[topic_id] = counts
+        self._names[topic_id] = name
+        for term, tf in counts.items():
+            self._postings[term][topic_id] = tf
+        self._dirty = True
+
+    def remove(self, topic_id: str) -> None:
+        counts = self._doc_terms.pop(topic_id, None)
+        if counts is None:
+            return
+        self._names.pop(topic_id, None)
+        self._with_memory.discard(topic_id)
+        for term in counts:
+            self._postings[term].pop(topic_id, None)
+            if not self._postings[term]:
+                del self._postings[term]
+        self._dirty = True
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        return math.log((1 + len(self._doc_terms)) / (1 + df)) + 1
+
+    def _refresh_norms(self) -> None:
+        # IDF shifts as topics are added, so document norms are recomputed lazily
+        self._norms = {
+            topic_id: math.sqrt(sum(
+                ((1 + math.log(tf)) * self._idf(term)) ** 2
+                for term, tf in counts.items()
+            )) or 1.0
+            for topic_id, counts in self._doc_terms.items()
+        }
+        self._dirty = False
+
+    def search(self, text: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (topic_id, cosine similarity) for the given text."""
+        if self._dirty:
+            self._refresh_norms()
+
+        query = Counter(t for t in _terms(text) if t in self._postings)
+        if not query:
+            return []
+
+        weights = {term: (1 + math.log(tf)) * self._idf(term) for term, tf in query.items()}
+        query_norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+        scores: Dict[str, float] = defaultdict(float)
+        for term, q_weight in weights.items():
+            idf = self._idf(term)
+            for topic_id, tf in self._postings[term].items():
+                scores[topic_id] += q_weight * (1 + math.log(tf)) * idf
+
+        ranked = sorted(
+            ((topic_id, score / (query_norm * self._norms[topic_id])) for topic_id, score in scores.items()),
+            key=lambda pair: pair[1],
+            reverse=True,
+        )
+        return ranked[:k]
+
+
+class TopicIndexRegistry:
+    """One TopicIndex per vertical, kept in sync with the topic catalog."""
+
+    def __init__(self):
+        self._indexes: Dict[str, TopicIndex] = {}
+        self._verticals: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _sync(self, view: TopicCatalogView) -> TopicIndex:
+        from agent.db import fetch_topic_memory_texts
+
+        index = self._indexes.setdefault(view.vertical, TopicIndex())
+        missing = [t for t in view.topics if t["id"] not in index]
+        if missing:
+            memory_texts = fetch_topic_memory_texts([t["id"] for t in missing])
+            for topic in missing:
+                index.upsert(topic["id"], topic["name"], memory_texts.get(topic["id"], ""))
+                self._verticals[topic["id"]] = view.vertical
+        return index
+
+    def shortlist(
+        self,
+        view: TopicCatalogView,
+        article_text: str,
+        k: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-k topics of the view's vertical most similar to the article."""
+        with self._lock:
+            index = self._sync(view)
+            return index.search(article_text, k or ROUTING_SHORTLIST_SIZE)
+
+    def has_memory(self, vertical: str, topic_ids: Iterable[str]) -> bool:
+        """True if every given topic of a loaded vertical has memory text indexed."""
+        with self._lock:
+            index = self._indexes.get(vertical)
+            return index is not None and all(index.has_memory(t) for t in topic_ids)
+
+    def add_topic(self, topic_id: str, topic_name: str, vertical: str) -> None:
+        with self._lock:
+            index = self._indexes.get(vertical)
+            if index is not None:
+                index.upsert(topic_id, topic_name)
+                self._verticals[topic_id] = vertical
+
+    def update_topic_memory(self, topic_id: str, memory_text: str) -> None:
+        """Re-index a topic whose memory changed, if its vertical is loaded."""
+        with self._lock:
+            vertical = self._verticals.get(topic_id)
+            index = self._indexes.get(vertical) if vertical else None
+            if index is not None and topic_id in index:
+                index.upsert(topic_id, index.name(topic_id), memory_text)
+
+    def clear(self) -> None:
+        """Forget every vertical, e.g. after switching storage backends."""
+        with self._lock:
+            self._indexes.clear()
+            self._verticals.clear()
+
+
+topic_index = TopicIndexRegistry()
@@ -1,2 +1,17 @@
-from agent.ui.telegram.handlers import send_proposal_notification
-from agent.ui.telegram.bot import run_bot
+"""
+Telegram review UI.
+Exports are resolved on first access, so importing a submodule (or the
+pipeline) does not load the python-telegram-bot application stack.
+"""
+
+__all__ = ["send_proposal_notification", "run_bot"]
+
+
+def __getattr__(name):
+    if name == "send_proposal_notification":
+        from agent.ui.telegram.handlers import send_proposal_notification
+        return send_proposal_notification
+    if name == "run_bot":
+        from agent.ui.telegram.bot import run_bot
+        return run_bot
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
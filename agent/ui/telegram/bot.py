@@ -3,8 +3,9 @@ Telegram bot entry point.
 """
 import os
 from dotenv import load_dotenv
-from telegram.ext import Application, CallbackQueryHandler, MessageHandler, filters
+from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, filters
 
+from agent.ui.telegram.bulk import handle_approve_all, handle_pending, handle_reject_all
 from agent.ui.telegram.handlers import handle_button, handle_rejection_reason
 
 load_dotenv()
@@ -17,6 +18,9 @@ def run_bot():
     app = Application.builder().token(TOKEN).build()
 
     app.add_handler(CallbackQueryHandler(handle_button))
+    app.add_handler(CommandHandler("pending", handle_pending))
+    app.add_handler(CommandHandler("approve_all", handle_approve_all))
+    app.add_handler(CommandHandler("reject_all", handle_reject_all))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_rejection_reason))
 
     app.run_polling()
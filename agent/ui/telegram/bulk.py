@@ -0,0 +1,304 @@
+"""
+Bulk review commands.
+/pending lists pending proposals by vertical; /approve_all and /reject_all
+resolve every pending proposal matching key=value filters, in chunks of
+batched DB writes, with a progress message.
+
+    /pending
+    /approve_all type=topic_routing vertical=ai
+    /reject_all domain=example.com weak source
+"""
+import asyncio
+import os
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from agent.catalog import topic_catalog
+from agent.db import (
+    append_progress_entries,
+    apply_memory_updates_to_db,
+    create_topics,
+    delete_pending_proposals,
+    fetch_pending_proposals,
+    fetch_topic_verticals,
+    log_accepted_proposals,
+    log_rejected_proposals,
+)
+from agent.metrics import metrics
+from agent.models import build_proposal_from_row
+from agent.ui.telegram.handlers import pending_cache
+
+# Proposals resolved per batch of DB writes (and per progress update)
+BULK_CHUNK_SIZE = int(os.getenv("TELEGRAM_BULK_CHUNK_SIZE", "50"))
+
+FILTER_KEYS = ("type", "vertical", "domain")
+
+USAGE = (
+    "Filters: type=topic_routing|memory_update, vertical=<name>, domain=<host>\n\n"
+    "/pending [filters]\n"
+    "/approve_all <filters>\n"
+    "/reject_all <filters> <reason>"
+)
+
+
+# =============================================================================
+# SELECTION
+# =============================================================================
+
+def parse_filters(args: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """Split command arguments into key=value filters and the remaining words."""
+    filters: Dict[str, str] = {}
+    words: List[str] = []
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if sep and key.lower() in FILTER_KEYS and value:
+            filters[key.lower()] = value.lower()
+        else:
+            words.append(arg)
+    return filters, words
+
+
+def source_domain(link: Optional[str]) -> str:
+    host = urlparse(link or "").netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _row_vertical(row: Dict, topic_verticals: Dict[str, str]) -> str:
+    # Memory updates only carry a topic id
+    return row.get("vertical") or topic_verticals.get(row.get("topic_id"), "unknown")
+
+
+def _matches(row: Dict, filters: Dict[str, str], topic_verticals: Dict[str, str]) -> bool:
+    if "type" in filters and row["proposal_type"] != filters["type"]:
+        return False
+    if "vertical" in filters and _row_vertical(row, topic_verticals).lower() != filters["vertical"]:
+        return False
+    if "domain" in filters:
+        domain = source_domain(row.get("source_link"))
+        if domain != filters["domain"] and not domain.endswith("." + filters["domain"]):
+            return False
+    return True
+
+
+def select_pending(filters: Dict[str, str]) -> Tuple[List[Dict], Dict[str, str]]:
+    """Pending rows matching the filters, plus the topic -> vertical map used."""
+    rows = fetch_pending_proposals()
+    topic_verticals = fetch_topic_verticals(
+        row["topic_id"] for row in rows if not row.get("vertical") and row.get("topic_id")
+    )
+    return [row for row in rows if _matches(row, filters, topic_verticals)], topic_verticals
+
+
+# =============================================================================
+# BATCHED DECISIONS
+# =============================================================================
+
+def _build(rows: List[Dict]) -> Tuple[List[Tuple[str, object]], int]:
+    built, failed = [], 0
+    for row in rows:
+        try:
+            built.append((str(row["id"]), build_proposal_from_row(row)))
+        except Exception as e:
+            print(f"[BULK] Skipping unparseable proposal {row.get('id')}: {e}")
+            failed += 1
+    return built, failed
+
+
+def _close(resolved: List[Tuple[str, object]]) -> None:
+    pending_ids = [pending_id for pending_id, _ in resolved]
+    delete_pending_proposals(pending_ids)
+    for pending_id in pending_ids:
+        pending_cache.discard(pending_id)
+
+
+def approve_rows(rows: List[Dict]) -> int:
+    """
+    Approve a chunk of pending rows; returns how many failed.
+
+    New topics are created first, in one batch: one per distinct name and
+    vertical, skipping names the vertical already has (including topics
+    created by earlier chunks), then logged and deleted in one write each.
+    If a write fails those rows stay pending, and approving them again
+    skips the topics that now exist.
+
+    Memory updates are grouped by topic and section, the last one winning,
+    and applied with one write per topic. Rows of topics that were updated
+    are then logged and deleted in one write each, before their progress
+    entries are added, so approving a row left pending again rewrites the
+    same belief without duplicating its history.
+    """
+    built, failed = _build(rows)
+    routing = [(i, p) for i, p in built if p.to_log_payload()["proposal_type"] == "topic_routing"]
+    updates = [(i, p) for i, p in built if p.to_log_payload()["proposal_type"] != "topic_routing"]
+
+    if routing:
+        try:
+            _approve_routing(routing)
+        except Exception as e:
+            print(f"[BULK] Failed to approve {len(routing)} topic proposals: {e}")
+            failed += len(routing)
+
+    if updates:
+        failed += _approve_updates(updates)
+
+    return failed
+
+
+def _approve_updates(updates: List[Tuple[str, object]]) -> int:
+    latest = {
+        (proposal.topic_id, proposal.schema_section.value): proposal
+        for _, proposal in updates
+    }
+    failed_topics = apply_memory_updates_to_db(list(latest.values()))
+
+    applied = [(i, p) for i, p in updates if p.topic_id not in failed_topics]
+    failed = len(updates) - len(applied)
+    if not applied:
+        return failed
+
+    try:
+        log_accepted_proposals([proposal for _, proposal in applied])
+        _close(applied)
+    except Exception as e:
+        print(f"[BULK] Applied {len(applied)} memory updates but could not resolve them: {e}")
+        return len(updates)
+
+    try:
+        append_progress_entries([p for p in latest.values() if p.topic_id not in failed_topics])
+    except Exception as e:
+        print(f"[BULK] Failed to add progress entries: {e}")
+    return failed
+
+
+def _approve_routing(routing: List[Tuple[str, object]]) -> None:
+    existing = {
+        vertical: {name.strip().lower() for name in topic_catalog.view(vertical).topic_names}
+        for vertical in {proposal.vertical for _, proposal in routing}
+    }
+    new_topics: Dict[Tuple[str, str], Dict] = {}
+    for _, proposal in routing:
+        key = (proposal.suggested_topic_name.strip().lower(), proposal.vertical)
+        if key[0] in existing[proposal.vertical]:
+            continue
+        new_topics.setdefault(key, {
+            "id": str(uuid.uuid4()),
+            "name": proposal.suggested_topic_name,
+            "vertical": proposal.vertical,
+        })
+
+    create_topics(list(new_topics.values()))
+    log_accepted_proposals([proposal for _, proposal in routing])
+    _close(routing)
+
+
+def reject_rows(rows: List[Dict], reason: str) -> int:
+    """Reject a chunk of pending rows with one reason; returns how many failed."""
+    built, failed = _build(rows)
+    log_rejected_proposals([proposal for _, proposal in built], reason)
+    _close(built)
+    return failed
+
+
+# =============================================================================
+# COMMAND HANDLERS
+# =============================================================================
+
+async def handle_pending(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List pending proposals by vertical and type."""
+    filters, _ = parse_filters(context.args or [])
+    try:
+        rows, topic_verticals = await asyncio.to_thread(select_pending, filters)
+    except Exception as e:
+        print(f"ERROR fetching pending proposals: {e}")
+        await update.message.reply_text(f"⚠️ Database error fetching proposals: {e}")
+        return
+
+    if not rows:
+        await update.message.reply_text("📭 No pending proposals.")
+        return
+
+    by_vertical: Dict[str, Counter] = defaultdict(Counter)
+    for row in rows:
+        by_vertical[_row_vertical(row, topic_verticals)][row["proposal_type"]] += 1
+
+    lines = [f"📋 PENDING: {len(rows)}", "━━━━━━━━━━━━━━━━━━━━━━", ""]
+    for vertical, counts in sorted(by_vertical.items(), key=lambda kv: -sum(kv[1].values())):
+        breakdown = ", ".join(f"{t} {n}" for t, n in counts.most_common())
+        lines.append(f"📂 {vertical}: {sum(counts.values())} ({breakdown})")
+
+    domains = Counter(source_domain(row.get("source_link")) for row in rows)
+    lines += ["", "🔗 Top sources: " + ", ".join(f"{d} {n}" for d, n in domains.most_common(5))]
+    await update.message.reply_text("\n".join(lines))
+
+
+async def _run_bulk(update: Update, verb: str, rows: List[Dict], apply_chunk) -> None:
+    """Resolve rows chunk by chunk, editing one progress message as it goes."""
+    progress = await update.message.reply_text(f"⏳ Resolving {len(rows)} proposals...")
+    done = failed = 0
+
+    with metrics.span(f"telegram.bulk_{verb.lower()}"):
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_CHUNK_SIZE]
+            try:
+                failed += await asyncio.to_thread(apply_chunk, chunk)
+            except Exception as e:
+                print(f"[BULK] {verb} failed for a chunk of {len(chunk)}: {e}")
+                failed += len(chunk)
+            done += len(chunk)
+
+            if done < len(rows):
+                await progress.edit_text(f"⏳ {verb} {done}/{len(rows)}...")
+
+    metrics.incr("telegram_bulk_resolved", done - failed, action=verb.lower())
+    summary = f"✅ {verb} {done - failed} of {len(rows)} proposals."
+    if failed:
+        summary += f"\n⚠️ {failed} failed and are still pending."
+    await progress.edit_text(summary)
+
+
+async def handle_approve_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Approve every pending proposal matching the filters."""
+    filters, _ = parse_filters(context.args or [])
+    if not filters:
+        await update.message.reply_text(f"⚠️ Give at least one filter.\n\n{USAGE}")
+        return
+
+    try:
+        rows, _ = await asyncio.to_thread(select_pending, filters)
+    except Exception as e:
+        print(f"ERROR fetching pending proposals: {e}")
+        await update.message.reply_text(f"⚠️ Database error fetching proposals: {e}")
+        return
+
+    if not rows:
+        await update.message.reply_text("📭 No pending proposals match.")
+        return
+
+    await _run_bulk(update, "Approved", rows, approve_rows)
+
+
+async def handle_reject_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Reject every pending proposal matching the filters with one reason."""
+    filters, words = parse_filters(context.args or [])
+    reason = " ".join(words).strip()
+    if not filters or not reason:
+        await update.message.reply_text(f"⚠️ Give at least one filter and a reason.\n\n{USAGE}")
+        return
+
+    try:
+        rows, _ = await asyncio.to_thread(select_pending, filters)
+    except Exception as e:
+        print(f"ERROR fetching pending proposals: {e}")
+        await update.message.reply_text(f"⚠️ Database error fetching proposals: {e}")
+        return
+
+    if not rows:
+        await update.message.reply_text("📭 No pending proposals match.")
+        return
+
+    await _run_bulk(update, "Rejected", rows, lambda chunk: reject_rows(chunk, reason))
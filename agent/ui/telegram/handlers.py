@@ -3,24 +3,73 @@ Telegram bot handlers, notifications, and UI components.
 """
 import os
 import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
+from agent.config import LazyClient
 from agent.db import (
-    fetch_pending_proposals,
+    fetch_pending_proposal,
     delete_pending_proposal,
     log_accepted_proposal,
     log_rejected_proposal,
 )
 from agent.models import build_proposal_from_row
+from agent.ui.telegram.notifier import Notification, NotificationDispatcher
 
 load_dotenv()
 
 _TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 _CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-_bot = Bot(token=_TOKEN)
+# Built on the first notification; override() it to send elsewhere
+_bot = LazyClient(lambda: Bot(token=_TOKEN))
+
+
+# =============================================================================
+# PENDING PROPOSAL CACHE
+# =============================================================================
+
+class PendingProposalCache:
+    """
+    In-process LRU cache of pending proposal rows by id, in the bot process.
+    Read-through on button clicks, dropped on approve/reject.
+    """
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._rows: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, row: Dict) -> None:
+        with self._lock:
+            self._rows[str(row["id"])] = row
+            self._rows.move_to_end(str(row["id"]))
+            while len(self._rows) > self.max_size:
+                self._rows.popitem(last=False)
+
+    def discard(self, pending_id: str) -> None:
+        with self._lock:
+            self._rows.pop(str(pending_id), None)
+
+    def get(self, pending_id: str) -> Optional[Dict]:
+        """Cached row, or a point lookup by id on a miss."""
+        with self._lock:
+            row = self._rows.get(str(pending_id))
+            if row is not None:
+                self._rows.move_to_end(str(pending_id))
+                return row
+
+        row = fetch_pending_proposal(pending_id)
+        if row is not None:
+            self.put(row)
+        return row
+
+
+pending_cache = PendingProposalCache()
 
 
 # =============================================================================
@@ -45,6 +94,37 @@ def resolved_keyboard(status: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup([[InlineKeyboardButton(label, callback_data="resolved")]])
 
 
+def digest_keyboard(pending_ids: List[str]) -> InlineKeyboardMarkup:
+    """One numbered approve/reject row per proposal in a digest."""
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton(f"✅ {n}", callback_data=f"approve:{pending_id}"),
+            InlineKeyboardButton(f"❌ {n}", callback_data=f"reject:{pending_id}"),
+        ]
+        for n, pending_id in enumerate(pending_ids, start=1)
+    ])
+
+
+def resolve_in_keyboard(markup, proposal_id: str, status: str) -> InlineKeyboardMarkup:
+    """
+    Mark one proposal resolved. Single-proposal messages get the resolved
+    keyboard; digests keep the buttons of their other proposals.
+    """
+    rows = list(getattr(markup, "inline_keyboard", None) or [])
+    if len(rows) <= 1:
+        return resolved_keyboard(status)
+
+    label = "☑️" if status == "approved" else "❌"
+    resolved_rows = []
+    for row in rows:
+        if any((button.callback_data or "").endswith(f":{proposal_id}") for button in row):
+            number = row[0].text.split()[-1]
+            resolved_rows.append([InlineKeyboardButton(f"{label} {number} {status}", callback_data="resolved")])
+        else:
+            resolved_rows.append(list(row))
+    return InlineKeyboardMarkup(resolved_rows)
+
+
 # =============================================================================
 # NOTIFICATIONS
 # =============================================================================
@@ -62,6 +142,33 @@ def format_proposal_for_telegram(proposal) -> str:
     )
 
 
+# Telegram caps messages at 4096 characters
+_MAX_MESSAGE_CHARS = 4096
+_DIGEST_LINE_CHARS = 300
+
+
+def _digest_line(n: int, proposal) -> str:
+    payload = proposal.to_log_payload()
+    if payload["proposal_type"] == "memory_update":
+        headline = f"📑 {payload['schema_section']} · topic {payload['topic_id']}\n✨ {payload['new_belief']}"
+    else:
+        headline = f"🆕 {payload['suggested_topic_name']} ({payload['vertical']})\n🧠 {payload['confidence_reason']}"
+
+    line = f"{n}. {headline}"
+    if len(line) > _DIGEST_LINE_CHARS:
+        line = line[:_DIGEST_LINE_CHARS - 1] + "…"
+    return f"{line}\n🔗 {payload['source_link']}"
+
+
+def format_digest_for_telegram(entries: List[Notification]) -> str:
+    text = (
+        f"🗞️ DIGEST: {len(entries)} PROPOSALS\n"
+        "━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        + "\n\n".join(_digest_line(n, proposal) for n, (proposal, _) in enumerate(entries, start=1))
+    )
+    return text[:_MAX_MESSAGE_CHARS]
+
+
 async def notify_new_proposal(proposal, pending_id: str):
     """Send a proposal notification with action buttons."""
     await send_message(
@@ -70,26 +177,25 @@ async def notify_new_proposal(proposal, pending_id: str):
     )
 
 
-_notification_loop = None
+async def notify_digest(entries: List[Notification]):
+    """Send several proposals as one message with a numbered button row each."""
+    await send_message(
+        text=format_digest_for_telegram(entries),
+        reply_markup=digest_keyboard([pending_id for _, pending_id in entries]),
+    )
 
-def send_proposal_notification(proposal, pending_id: str) -> None:
-    """Send notification, handling event loop context automatically."""
-    global _notification_loop
 
-    try:
-        loop = asyncio.get_running_loop()
-        # Already in an async context - schedule as task
-        loop.create_task(notify_new_proposal(proposal, pending_id))
-        return
-    except RuntimeError:
-        pass
+notifier = NotificationDispatcher(send_one=notify_new_proposal, send_digest=notify_digest)
+
 
-    # Not in async context - use persistent loop to avoid Windows "Event loop is closed" errors
-    if _notification_loop is None or _notification_loop.is_closed():
-        _notification_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(_notification_loop)
+def send_proposal_notification(proposal, pending_id: str) -> None:
+    """Queue a proposal notification; the notifier thread sends it."""
+    notifier.submit(proposal, pending_id)
 
-    _notification_loop.run_until_complete(notify_new_proposal(proposal, pending_id))
+
+def flush_notifications() -> None:
+    """Block until every queued notification has been sent."""
+    notifier.flush()
 
 
 # =============================================================================
@@ -105,6 +211,7 @@ def apply_review_decision(proposal, pending_id: str, decision: str, reason: str
         log_rejected_proposal(proposal, reason or "")
 
     delete_pending_proposal(pending_id)
+    pending_cache.discard(pending_id)
 
 
 # =============================================================================
@@ -140,28 +247,24 @@ async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    # Load pending proposal from DB
+    # Load pending proposal (cache, then point lookup by id)
     try:
-        pending_rows = fetch_pending_proposals()
+        proposal_row = await asyncio.to_thread(pending_cache.get, proposal_id)
     except Exception as e:
-        print(f"ERROR fetching pending proposals: {e}")
+        print(f"ERROR fetching pending proposal: {e}")
         await context.bot.send_message(
             chat_id=query.message.chat_id,
             text=f"⚠️ Database error fetching proposals: {e}",
         )
         return
 
-    pending_rows = [row for row in pending_rows if row["id"] == proposal_id]
-
-    if not pending_rows:
+    if proposal_row is None:
         await context.bot.send_message(
             chat_id=query.message.chat_id,
             text="⚠️ Proposal not found or already resolved.",
         )
         return
 
-    proposal_row = pending_rows[0]
-
     # Rebuild proposal object
     try:
         proposal = build_proposal_from_row(proposal_row)
@@ -191,7 +294,9 @@ async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
 
-        await query.edit_message_reply_markup(reply_markup=resolved_keyboard("approved"))
+        await query.edit_message_reply_markup(
+            reply_markup=resolve_in_keyboard(query.message.reply_markup, proposal_id, "approved")
+        )
         await context.bot.send_message(chat_id=query.message.chat_id, text="✅ Proposal approved and applied.")
         return
 
@@ -199,7 +304,9 @@ async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = query.message.chat_id
     AWAITING_REJECTION_REASON[chat_id] = proposal_id
 
-    await query.edit_message_reply_markup(reply_markup=resolved_keyboard("rejected"))
+    await query.edit_message_reply_markup(
+        reply_markup=resolve_in_keyboard(query.message.reply_markup, proposal_id, "rejected")
+    )
     await context.bot.send_message(
         chat_id=chat_id,
         text=(
@@ -225,22 +332,19 @@ async def handle_rejection_reason(update: Update, context: ContextTypes.DEFAULT_
     proposal_id = AWAITING_REJECTION_REASON.pop(chat_id)
 
     try:
-        pending_rows = fetch_pending_proposals()
+        proposal_row = await asyncio.to_thread(pending_cache.get, proposal_id)
     except Exception as e:
-        print(f"ERROR fetching pending proposals: {e}")
+        print(f"ERROR fetching pending proposal: {e}")
         await context.bot.send_message(
             chat_id=chat_id,
             text=f"⚠️ Database error fetching proposals: {e}",
         )
         return
 
-    pending_rows = [row for row in pending_rows if row["id"] == proposal_id]
-    if not pending_rows:
+    if proposal_row is None:
         await context.bot.send_message(chat_id=chat_id, text="⚠️ Proposal no longer pending.")
         return
 
-    proposal_row = pending_rows[0]
-
     try:
         proposal = build_proposal_from_row(proposal_row)
     except Exception as e:
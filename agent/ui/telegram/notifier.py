@@ -0,0 +1,210 @@
+"""
+Background notification dispatcher.
+Ingestion enqueues proposals and returns; a single sender thread drains the
+queue within Telegram's rate limits, waits out flood control, and can group
+low-priority proposals into digest messages.
+"""
+import asyncio
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from agent.llm import TokenBucket
+from agent.metrics import metrics
+
+
+NOTIFY_QUEUE_SIZE = int(os.getenv("TELEGRAM_QUEUE_SIZE", "500"))
+# Telegram allows about one message per second in a chat and 20 per minute in a group
+MESSAGES_PER_MINUTE = float(os.getenv("TELEGRAM_MESSAGES_PER_MINUTE", "20"))
+MIN_SEND_INTERVAL_SECONDS = float(os.getenv("TELEGRAM_MIN_SEND_INTERVAL_SECONDS", "1.0"))
+MAX_SEND_RETRIES = int(os.getenv("TELEGRAM_MAX_SEND_RETRIES", "5"))
+# Comma-separated proposal types batched into digests, e.g. "memory_update"; empty = off
+DIGEST_TYPES = {t.strip() for t in os.getenv("TELEGRAM_DIGEST_TYPES", "").split(",") if t.strip()}
+DIGEST_SIZE = int(os.getenv("TELEGRAM_DIGEST_SIZE", "10"))
+DIGEST_INTERVAL_SECONDS = float(os.getenv("TELEGRAM_DIGEST_INTERVAL_SECONDS", "300"))
+
+Notification = Tuple[object, str]  # (proposal, pending_id)
+
+_FLUSH = object()
+_STOP = object()
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Flood-wait delay of a telegram.error.RetryAfter (int or timedelta), else None."""
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class NotificationDispatcher:
+    """
+    Bounded queue plus one sender thread.
+
+    submit() only blocks when the queue is full. The sender owns the event
+    loop every send runs on (the bot's HTTP client is bound to one loop),
+    spaces messages by a per-minute bucket and a minimum interval, and
+    retries RetryAfter errors after the requested delay. Proposals whose
+    type is in digest_types are held until digest_size of them are queued
+    or digest_interval seconds pass, then sent as one message.
+    """
+
+    def __init__(
+        self,
+        send_one: Callable[[object, str], Awaitable[None]],
+        send_digest: Callable[[List[Notification]], Awaitable[None]],
+        queue_size: Optional[int] = None,
+        messages_per_minute: Optional[float] = None,
+        min_interval: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        digest_types: Optional[Set[str]] = None,
+        digest_size: Optional[int] = None,
+        digest_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._send_one = send_one
+        self._send_digest = send_digest
+        self.queue_size = queue_size or NOTIFY_QUEUE_SIZE
+        self.min_interval = MIN_SEND_INTERVAL_SECONDS if min_interval is None else min_interval
+        self.max_retries = MAX_SEND_RETRIES if max_retries is None else max_retries
+        self.digest_types = DIGEST_TYPES if digest_types is None else digest_types
+        self.digest_size = digest_size or DIGEST_SIZE
+        self.digest_interval = DIGEST_INTERVAL_SECONDS if digest_interval is None else digest_interval
+
+        self._clock = clock
+        self._sleep = sleep
+        self._bucket = TokenBucket(
+            messages_per_minute or MESSAGES_PER_MINUTE, clock=clock, sleep=sleep
+        )
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._last_sent: Optional[float] = None
+        self._digest: List[Notification] = []
+        self._digest_started = 0.0
+
+    # --- producer side -------------------------------------------------------
+
+    def submit(self, proposal, pending_id: str) -> None:
+        """Queue a proposal notification."""
+        self._ensure_started()
+        self._queue.put((proposal, pending_id))
+        metrics.incr("telegram_queued")
+
+    def flush(self) -> None:
+        """Send any held digest and wait until everything queued so far is sent."""
+        if self._thread is None:
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self) -> None:
+        """Drain the queue and stop the sender thread."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="telegram-notifier", daemon=True
+                )
+                self._thread.start()
+                # Runs before daemon threads are torn down at interpreter exit
+                atexit.register(self.close)
+
+    # --- sender thread -------------------------------------------------------
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            while True:
+                try:
+                    entry = self._queue.get(timeout=self._digest_timeout())
+                except queue.Empty:
+                    self._flush_digest(loop)
+                    continue
+
+                try:
+                    if entry is _STOP:
+                        self._flush_digest(loop)
+                        return
+                    if entry is _FLUSH:
+                        self._flush_digest(loop)
+                        continue
+
+                    proposal, pending_id = entry
+                    if proposal.to_log_payload()["proposal_type"] in self.digest_types:
+                        if not self._digest:
+                            self._digest_started = self._clock()
+                        self._digest.append(entry)
+                        if len(self._digest) >= self.digest_size:
+                            self._flush_digest(loop)
+                    else:
+                        self._send(loop, self._send_one, proposal, pending_id)
+                finally:
+                    self._queue.task_done()
+        finally:
+            loop.close()
+
+    def _digest_timeout(self) -> Optional[float]:
+        if not self._digest:
+            return None
+        return max(0.0, self._digest_started + self.digest_interval - self._clock())
+
+    def _flush_digest(self, loop: asyncio.AbstractEventLoop) -> None:
+        if not self._digest:
+            return
+        entries, self._digest = self._digest, []
+        if len(entries) == 1:
+            self._send(loop, self._send_one, *entries[0])
+        else:
+            self._send(loop, self._send_digest, entries)
+        metrics.incr("telegram_digest_items", len(entries))
+
+    def _wait_turn(self) -> None:
+        self._bucket.acquire()
+        if self._last_sent is not None:
+            wait = self._last_sent + self.min_interval - self._clock()
+            if wait > 0:
+                self._sleep(wait)
+        self._last_sent = self._clock()
+
+    def _send(self, loop: asyncio.AbstractEventLoop, send: Callable[..., Awaitable[None]], *args) -> bool:
+        for attempt in range(self.max_retries + 1):
+            self._wait_turn()
+            try:
+                with metrics.span("telegram.send"):
+                    loop.run_until_complete(send(*args))
+                metrics.incr("telegram_sends")
+                return True
+            except Exception as e:
+                retry_after = _retry_after_seconds(e)
+                if retry_after is None or attempt == self.max_retries:
+                    # The proposal stays pending in the database
+                    print(f"[TELEGRAM] Notification failed: {e}")
+                    metrics.incr("telegram_send_failures")
+                    return False
+
+                print(f"[TELEGRAM] Flood control, retrying in {retry_after:.1f}s (attempt {attempt + 1})")
+                metrics.incr("telegram_flood_waits")
+                self._bucket.drain()
+                self._sleep(retry_after)
+        return False
@@ -0,0 +1,127 @@
+"""
+Benchmark: import cost of the agent's entry points.
+Imports each module in a fresh `python -X importtime` interpreter and
+reports its cumulative import time, the heaviest top-level packages it
+pulls in, and which client stacks (Groq, Supabase, Telegram) were loaded,
+as JSON.
+
+Usage:
+    python -m benchmarks.import_time [--modules run_discovery,agent.pipeline]
+        [--repeat 5] [--top 10] [--out FILE]
+
+Compare reports across commits to see what an import change saves.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+DEFAULT_MODULES = [
+    "run_discovery",
+    "agent.pipeline",
+    "agent.config",
+    "agent.db",
+    "agent.ui.telegram.handlers",
+]
+
+# Client stacks that should only load when a client is actually used
+CLIENT_PACKAGES = ["langchain_groq", "groq", "supabase", "telegram"]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(module: str) -> List[Tuple[str, int, int]]:
+    """(name, self_us, cumulative_us) for every module imported by `import module`."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_REPO_ROOT, os.getenv("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=_REPO_ROOT, env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def summarize(module: str, repeat: int, top: int) -> Dict:
+    totals: List[int] = []
+    packages: Dict[str, List[int]] = defaultdict(list)
+    loaded = set()
+
+    for _ in range(repeat):
+        rows = import_profile(module)
+        totals.append(next((cum for name, _, cum in reversed(rows) if name == module), 0))
+
+        per_package: Dict[str, int] = defaultdict(int)
+        for name, _, cumulative in rows:
+            package = name.split(".")[0]
+            loaded.add(package)
+            if name == package:
+                per_package[package] = max(per_package[package], cumulative)
+        for package, cumulative in per_package.items():
+            packages[package].append(cumulative)
+
+    heaviest = sorted(
+        ((package, statistics.median(values)) for package, values in packages.items()
+         if package != module.split(".")[0]),
+        key=lambda pair: pair[1],
+        reverse=True,
+    )[:top]
+
+    return {
+        "module": module,
+        "cumulative_ms_median": round(statistics.median(totals) / 1000, 2),
+        "cumulative_ms_min": round(min(totals) / 1000, 2),
+        "heaviest_packages_ms": {package: round(us / 1000, 2) for package, us in heaviest},
+        "client_packages_loaded": {package: package in loaded for package in CLIENT_PACKAGES},
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=_REPO_ROOT,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="comma-separated modules")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="heaviest packages to list")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in filter(None, args.modules.split(",")):
+        try:
+            results.append(summarize(module, args.repeat, args.top))
+        except RuntimeError as e:
+            results.append({"module": module, "error": str(e)})
+
+    text = json.dumps({"commit": _git_commit(), "python": sys.version.split()[0], "results": results}, indent=2)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Benchmark: LLM gateway under injected rate limits.
+Drives LLMGateway against FlakyModel, a fake chat model that adds latency
+and answers a share of calls with HTTP 429 (some with Retry-After), on a
+simulated clock so minutes of provider time run in well under a second.
+Checks that Retry-After is honoured, backoff stays within max_delay, the
+RPM/TPM buckets never admit more than they allow, and a model that always
+rate-limits fails after max_retries; reports calls, retries and achieved
+throughput as JSON.
+
+Usage:
+    python -m benchmarks.llm_gateway [--calls 200] [--rpm 30] [--tpm 30000]
+        [--rate-limit-rate 0.2] [--latency 1.5] [--seed 0] [--out FILE]
+
+Exits non-zero if a check fails.
+"""
+import argparse
+import contextlib
+import json
+import random
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from agent.llm import LLMGateway, estimate_tokens
+
+
+class SimClock:
+    """Simulated monotonic clock; sleep() advances it instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        # A real sleep always lets some time pass; without a floor, float
+        # rounding in a bucket's wait can leave the clock where it was
+        self.now += max(seconds, 1e-6)
+
+
+class RateLimited(Exception):
+    """Looks like a provider 429 to agent.llm's error classification."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: Optional[float]):
+        super().__init__("429 Too Many Requests")
+        self.retry_after = retry_after
+        headers = {} if retry_after is None else {"retry-after": str(retry_after)}
+        self.response = type("Response", (), {"status_code": 429, "headers": headers})()
+
+
+class FlakyModel:
+    """
+    Fake chat model on a SimClock. Each call takes `latency` simulated
+    seconds, then fails with 429 at `rate_limit_rate`; half of those carry a
+    Retry-After of 1-20 s.
+    """
+
+    model_name = "flaky"
+
+    def __init__(self, clock: SimClock, latency: float, rate_limit_rate: float, seed: int):
+        self.clock = clock
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.rng = random.Random(seed)
+        self.starts: List[float] = []
+        self.raised: List[RateLimited] = []
+
+    def invoke(self, messages, **kwargs):
+        self.starts.append(self.clock())
+        self.clock.sleep(self.latency)
+
+        if self.rng.random() < self.rate_limit_rate:
+            retry_after = float(self.rng.randint(1, 20)) if self.rng.random() < 0.5 else None
+            error = RateLimited(retry_after)
+            self.raised.append(error)
+            raise error
+        return type("AIMessage", (), {"content": "ok"})()
+
+
+class RecordingGateway(LLMGateway):
+    """LLMGateway that records each backoff delay and the error behind it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.backoffs: List[Tuple[Optional[float], float]] = []
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        delay = super()._backoff_delay(attempt, error)
+        self.backoffs.append((getattr(error, "retry_after", None), delay))
+        return delay
+
+
+def _bucket_violations(starts: List[float], costs: List[float], per_minute: float) -> int:
+    """Calls admitted beyond a full bucket plus its refill since the first call."""
+    violations = 0
+    used = 0.0
+    for start, cost in zip(starts, costs):
+        used += min(cost, per_minute)
+        if used > per_minute + (start - starts[0]) * per_minute / 60.0 + 1e-6:
+            violations += 1
+    return violations
+
+
+def run_gateway(args) -> Dict:
+    random.seed(args.seed)  # backoff jitter
+    clock = SimClock()
+    model = FlakyModel(clock, args.latency, args.rate_limit_rate, args.seed)
+    gateway = RecordingGateway(
+        model,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        max_retries=args.max_retries,
+        max_delay=args.max_delay,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    messages = ["x" * 2000]
+    estimated = estimate_tokens(messages) + gateway.expected_output_tokens
+    completed = failed = 0
+    for _ in range(args.calls):
+        try:
+            gateway.invoke(messages)
+            completed += 1
+        except RateLimited:
+            failed += 1
+
+    retry_after_ok = all(
+        delay == min(retry_after, args.max_delay)
+        for retry_after, delay in gateway.backoffs
+        if retry_after is not None
+    )
+    backoff_ok = all(0 < delay <= args.max_delay for _, delay in gateway.backoffs)
+    rpm_violations = _bucket_violations(model.starts, [1.0] * len(model.starts), args.rpm)
+    tpm_violations = _bucket_violations(model.starts, [estimated] * len(model.starts), args.tpm)
+
+    minutes = clock() / 60.0
+    return {
+        "calls": args.calls,
+        "completed": completed,
+        "failed": failed,
+        "provider_attempts": len(model.starts),
+        "rate_limited": len(model.raised),
+        "stats": dict(gateway.stats),
+        "simulated_minutes": round(minutes, 2),
+        "completed_per_minute": round(completed / minutes, 2) if minutes else None,
+        "checks": {
+            "retry_after_honoured": retry_after_ok,
+            "backoff_within_max_delay": backoff_ok,
+            "rpm_violations": rpm_violations,
+            "tpm_violations": tpm_violations,
+        },
+    }
+
+
+def run_always_limited(args) -> Dict:
+    """A model that always returns 429 must fail after max_retries retries."""
+    clock = SimClock()
+    model = FlakyModel(clock, args.latency, 1.0, args.seed)
+    gateway = RecordingGateway(
+        model, max_retries=args.max_retries, max_delay=args.max_delay,
+        clock=clock, sleep=clock.sleep,
+    )
+    try:
+        gateway.invoke(["x"])
+        raised = False
+    except RateLimited:
+        raised = True
+    return {
+        "raised": raised,
+        "provider_attempts": len(model.starts),
+        "expected_attempts": args.max_retries + 1,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--rpm", type=float, default=30)
+    parser.add_argument("--tpm", type=float, default=30000)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.2, help="share of calls answered with 429")
+    parser.add_argument("--latency", type=float, default=1.5, help="simulated seconds per provider call")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--max-delay", type=float, default=8.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = {
+        "settings": {
+            "rpm": args.rpm,
+            "tpm": args.tpm,
+            "rate_limit_rate": args.rate_limit_rate,
+            "latency_s": args.latency,
+            "max_retries": args.max_retries,
+            "max_delay_s": args.max_delay,
+            "seed": args.seed,
+        },
+    }
+    # The gateway logs each retry; keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        report["gateway"] = run_gateway(args)
+        report["always_rate_limited"] = run_always_limited(args)
+
+    text = json.dumps(report, indent=2)
+    sys.stdout.write(text + "\n")
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+    checks = report["gateway"]["checks"]
+    limited = report["always_rate_limited"]
+    ok = (
+        checks["retry_after_honoured"]
+        and checks["backoff_within_max_delay"]
+        and checks["rpm_violations"] == 0
+        and checks["tpm_violations"] == 0
+        and limited["raised"]
+        and limited["provider_attempts"] == limited["expected_attempts"]
+    )
+    if not ok:
+        sys.exit("gateway check failed")
+
+
+if __name__ == "__main__":
+    main()
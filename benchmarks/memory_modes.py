@@ -0,0 +1,150 @@
+"""
+Benchmark: two-step vs fused memory update.
+Runs each case through both modes against the configured model and reports
+latency, LLM calls, prompt tokens and proposal yield per mode as JSON.
+
+Usage:
+    LLM_CACHE_MODE=off python -m benchmarks.memory_modes [--cases FILE] [--repeat N] [--out FILE]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from agent.llm import estimate_tokens
+from agent.memory import (
+    identify_candidate_sections,
+    select_schema_section,
+    build_memory_update,
+    build_fused_memory_update,
+)
+from agent.models import SchemaSection, TopicMemory
+from agent.prompt_budget import serialize_topic_memory
+
+
+DEFAULT_CASES = os.path.join(os.path.dirname(__file__), "fixtures", "memory_cases.json")
+
+
+class MeteredModel:
+    """Counts calls and estimated prompt tokens of a wrapped chat model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(messages)
+        return self.model.invoke(messages, **kwargs)
+
+
+def run_two_step(topic_memory: TopicMemory, candidates: List[str], article_text: str, model):
+    section, reason = select_schema_section(
+        article_text=article_text,
+        candidate_sections=candidates,
+        topic_memory_text=serialize_topic_memory(topic_memory),
+        model=model,
+    )
+    if section is None or section == "NO_UPDATE":
+        return section, None
+
+    try:
+        proposal = build_memory_update(
+            topic_memory=topic_memory,
+            chosen_section=section,
+            justification=reason,
+            article_text=article_text,
+            source_link="benchmark",
+            model=model,
+        )
+    except ValueError:
+        return None, None
+    return section, proposal
+
+
+def run_fused(topic_memory: TopicMemory, candidates: List[str], article_text: str, model):
+    proposal, reason = build_fused_memory_update(
+        topic_memory=topic_memory,
+        candidate_sections=candidates,
+        article_text=article_text,
+        source_link="benchmark",
+        model=model,
+    )
+    if proposal is None:
+        return ("NO_UPDATE" if reason == "NO_UPDATE" else None), None
+    return proposal.schema_section.value, proposal
+
+
+MODES = {"two_step": run_two_step, "fused": run_fused}
+
+
+def benchmark(cases: List[Dict], model, repeat: int) -> Dict:
+    per_mode: Dict[str, Dict[str, list]] = {
+        mode: {"latency": [], "calls": [], "prompt_tokens": [], "sections": [], "proposals": 0}
+        for mode in MODES
+    }
+
+    for _ in range(repeat):
+        for case in cases:
+            topic_memory = TopicMemory(topic_name=None, **case["topic_memory"])
+            article_text = case["article_text"]
+            # Always exercise the memory path, even when heuristics find nothing
+            candidates = identify_candidate_sections(article_text) or [s.value for s in SchemaSection]
+
+            for mode, run in MODES.items():
+                metered = MeteredModel(model)
+                start = time.perf_counter()
+                section, proposal = run(topic_memory, candidates, article_text, metered)
+                stats = per_mode[mode]
+                stats["latency"].append(time.perf_counter() - start)
+                stats["calls"].append(metered.calls)
+                stats["prompt_tokens"].append(metered.prompt_tokens)
+                stats["sections"].append(section)
+                stats["proposals"] += proposal is not None
+
+    total = len(cases) * repeat
+    report = {"cases": len(cases), "repeat": repeat, "modes": {}}
+    for mode, stats in per_mode.items():
+        report["modes"][mode] = {
+            "latency_mean_s": statistics.mean(stats["latency"]),
+            "latency_p50_s": statistics.median(stats["latency"]),
+            "llm_calls_per_article": statistics.mean(stats["calls"]),
+            "prompt_tokens_per_article": statistics.mean(stats["prompt_tokens"]),
+            "proposal_yield": stats["proposals"] / total,
+        }
+
+    agree = sum(
+        a == b for a, b in zip(per_mode["two_step"]["sections"], per_mode["fused"]["sections"])
+    )
+    report["section_agreement"] = agree / total
+    return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", default=DEFAULT_CASES, help="JSON list of cases")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from agent.config import model
+
+    with open(args.cases) as f:
+        cases = json.load(f)
+
+    report = benchmark(cases, model, args.repeat)
+    text = json.dumps(report, indent=2)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,538 @@
+"""
+Benchmark: end-to-end pipeline throughput.
+Drives run_discovery (fixture feeds -> dedup -> dispatch) and
+run_article_ingestion directly, with a fake chat model and a local SQLite
+store, for several item counts and worker counts. Reports articles/s,
+p50/p95 per-article latency, LLM calls, prompt tokens and DB round trips
+per article as JSON.
+
+Usage:
+    python -m benchmarks.pipeline_throughput [--items 30,120] [--workers 1,4]
+        [--mode both|discovery|ingestion] [--latency 0.02] [--out FILE]
+
+Nothing leaves the process: feeds are served from benchmarks/fixtures/feeds,
+the model is FakeChatModel and storage is an in-memory SQLiteStorage.
+Per-article latency is the time spent in run_article_ingestion; batch
+routing done by the dispatcher is only reflected in articles/s.
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from langchain_core.messages import AIMessage
+
+from agent.llm import estimate_tokens
+from agent.memory import (
+    FUSED_SECTION_UPDATE_PROMPT,
+    SECTION_REWRITE_PROMPT,
+    SECTION_SELECTION_PROMPT,
+)
+from agent.models import SchemaSection
+from agent.routing import (
+    BATCH_TOPIC_ROUTING_PROMPT,
+    EXISTING_TOPIC_ROUTING_PROMPT,
+    NEW_TOPIC_PROMPT,
+)
+
+
+FIXTURE_FEEDS = os.path.join(os.path.dirname(__file__), "fixtures", "feeds")
+
+_WORDS = (
+    "model data latency memory training inference benchmark protocol network "
+    "validator market pricing revenue customer growth retrieval context agent "
+    "compiler kernel cache storage queue stream consensus rollup token yield "
+    "liquidity search ranking embedding graph schedule cluster regional"
+).split()
+_SECTIONS = [s.value for s in SchemaSection]
+
+
+# =============================================================================
+# FAKE CHAT MODEL
+# =============================================================================
+
+class FakeChatModel:
+    """
+    Stand-in chat model for the pipeline's prompts.
+
+    Sleeps `latency` seconds per call and answers in each prompt's expected
+    format. Decisions are drawn from a RNG seeded by the prompt text, so the
+    same prompt always gets the same answer regardless of thread timing.
+    `script` maps a prompt kind ("route", "batch_route", "new_topic",
+    "select", "rewrite", "fused") to a fixed response text that replaces
+    the generated one.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        match_rate: float = 0.7,
+        new_topic_rate: float = 0.3,
+        update_rate: float = 0.8,
+        seed: int = 0,
+        script: Optional[Dict[str, str]] = None,
+    ):
+        self.latency = latency
+        self.match_rate = match_rate
+        self.new_topic_rate = new_topic_rate
+        self.update_rate = update_rate
+        self.seed = seed
+        self.script = script or {}
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.prompt_tokens = 0
+
+    def invoke(self, messages, **kwargs):
+        prompt = messages[-1].content
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += estimate_tokens(messages)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        kind = _prompt_kind(prompt)
+        if kind in self.script:
+            return AIMessage(content=self.script[kind])
+
+        rng = random.Random(zlib.crc32(prompt.encode()) ^ self.seed)
+        return AIMessage(content=getattr(self, f"_answer_{kind}")(prompt, rng))
+
+    def _route_line(self, topic_ids: List[str], rng: random.Random) -> str:
+        if topic_ids and rng.random() < self.match_rate:
+            return f"TOPIC_ID: {rng.choice(topic_ids)}\nREASON: Scripted match."
+        return "TOPIC_ID: NO_TOPIC\nREASON: Scripted miss."
+
+    def _answer_route(self, prompt: str, rng: random.Random) -> str:
+        return self._route_line(_listed_topic_ids(prompt), rng)
+
+    def _answer_batch_route(self, prompt: str, rng: random.Random) -> str:
+        topic_ids = _listed_topic_ids(prompt)
+        numbers = re.findall(r"^ARTICLE (\d+):", prompt, re.MULTILINE)
+        return "\n\n".join(
+            f"ARTICLE: {number}\n{self._route_line(topic_ids, rng)}" for number in numbers
+        )
+
+    def _answer_new_topic(self, prompt: str, rng: random.Random) -> str:
+        if rng.random() < self.new_topic_rate:
+            return (
+                "DECISION: NEW_TOPIC\n"
+                f"TOPIC_NAME: Benchmark topic {rng.randrange(10 ** 6)}\n"
+                "REASON: Scripted new topic."
+            )
+        return "DECISION: NO_NEW_TOPIC\nREASON: Scripted fit."
+
+    def _answer_select(self, prompt: str, rng: random.Random) -> str:
+        block = prompt.split("Candidate Schema Sections:", 1)[-1].split("Article Text:", 1)[0]
+        candidates = [s for s in _SECTIONS if s in block]
+        if candidates and rng.random() < self.update_rate:
+            return f"SECTION: {rng.choice(candidates)}\nREASON: Scripted selection."
+        return "SECTION: NO_UPDATE\nREASON: Scripted no-op."
+
+    def _answer_rewrite(self, prompt: str, rng: random.Random) -> str:
+        return f"NEW_BELIEF: Scripted belief {rng.randrange(10 ** 6)}."
+
+    def _answer_fused(self, prompt: str, rng: random.Random) -> str:
+        candidates = re.findall(r"^\[(\w+)\]$", prompt, re.MULTILINE)
+        if candidates and rng.random() < self.update_rate:
+            return (
+                f"SECTION: {rng.choice(candidates)}\n"
+                "REASON: Scripted selection.\n"
+                f"NEW_BELIEF: Scripted belief {rng.randrange(10 ** 6)}."
+            )
+        return "SECTION: NO_UPDATE\nREASON: Scripted no-op."
+
+
+_PROMPT_KINDS = [
+    (BATCH_TOPIC_ROUTING_PROMPT, "batch_route"),
+    (EXISTING_TOPIC_ROUTING_PROMPT, "route"),
+    (FUSED_SECTION_UPDATE_PROMPT, "fused"),
+    (SECTION_SELECTION_PROMPT, "select"),
+    (SECTION_REWRITE_PROMPT, "rewrite"),
+    (NEW_TOPIC_PROMPT.split("{vertical}", 1)[0], "new_topic"),
+]
+
+
+def _prompt_kind(prompt: str) -> str:
+    for prefix, kind in _PROMPT_KINDS:
+        if prompt.startswith(prefix):
+            return kind
+    raise ValueError(f"Unrecognised prompt: {prompt[:80]!r}")
+
+
+def _listed_topic_ids(prompt: str) -> List[str]:
+    return re.findall(r"^- (\S+): ", prompt, re.MULTILINE)
+
+
+# =============================================================================
+# STORAGE ROUND-TRIP COUNTER
+# =============================================================================
+
+class CountingStorage:
+    """Proxy that counts calls (round trips) per storage method."""
+
+    def __init__(self, storage):
+        self._storage = storage
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._storage, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            with self._lock:
+                self.calls[name] += 1
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+# =============================================================================
+# FIXTURE FEEDS
+# =============================================================================
+
+def load_templates(feed_dir: str = FIXTURE_FEEDS) -> Dict[str, List[Dict]]:
+    """Entries of each fixture feed, keyed by the vertical in its channel title."""
+    templates: Dict[str, List[Dict]] = {}
+    for path in sorted(glob.glob(os.path.join(feed_dir, "*.xml"))):
+        channel = ET.parse(path).getroot().find("channel")
+        vertical = channel.findtext("title").split()[0]
+        templates.setdefault(vertical, []).extend(
+            {
+                "title": item.findtext("title"),
+                "link": item.findtext("link"),
+                "description": item.findtext("description"),
+            }
+            for item in channel.findall("item")
+        )
+    return templates
+
+
+def build_items(templates: Dict[str, List[Dict]], count: int, seed: int = 0) -> List[Dict]:
+    """
+    count distinct discovery items, round-robin over verticals. Each is a
+    fixture entry with a unique link and extra random words, so the
+    near-duplicate filter keeps it.
+    """
+    rng = random.Random(seed)
+    verticals = sorted(templates)
+    start = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    items = []
+    for i in range(count):
+        vertical = verticals[i % len(verticals)]
+        entry = templates[vertical][(i // len(verticals)) % len(templates[vertical])]
+        items.append({
+            "title": f"{entry['title']} ({i})",
+            "text": f"{entry['description']} {' '.join(rng.choices(_WORDS, k=40))}",
+            "source": "rss",
+            "source_link": f"{entry['link']}?item={i}",
+            "published_at": format_datetime(start - timedelta(minutes=i)),
+            "vertical": vertical,
+        })
+    return items
+
+
+def build_feeds(items: List[Dict], feeds_per_vertical: int) -> Tuple[Dict[str, List[str]], Dict[str, bytes]]:
+    """Split items into RSS documents; returns (feed_map, body per feed URL)."""
+    grouped: Dict[str, List[List[Dict]]] = {}
+    for i, item in enumerate(items):
+        feeds = grouped.setdefault(item["vertical"], [[] for _ in range(feeds_per_vertical)])
+        feeds[i % feeds_per_vertical].append(item)
+
+    feed_map: Dict[str, List[str]] = {}
+    bodies: Dict[str, bytes] = {}
+    for vertical, feeds in grouped.items():
+        for n, feed_items in enumerate(feeds):
+            url = f"http://fixtures.invalid/{vertical}/{n}.xml"
+            entries = "".join(
+                f"<item><title>{escape(item['title'])}</title>"
+                f"<link>{escape(item['source_link'])}</link>"
+                f"<description>{escape(item['text'])}</description>"
+                f"<pubDate>{item['published_at']}</pubDate></item>"
+                for item in feed_items
+            )
+            bodies[url] = (
+                f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+                f"<title>{vertical}</title>{entries}</channel></rss>"
+            ).encode()
+            feed_map.setdefault(vertical, []).append(url)
+    return feed_map, bodies
+
+
+class _FixtureResponse:
+    """Minimal HTTPResponse stand-in for rss._fetch_feed."""
+
+    def __init__(self, body: bytes, url: str):
+        self._body = body
+        self._url = url
+        self.headers = {"Content-Type": "application/rss+xml"}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read(self) -> bytes:
+        return self._body
+
+    def geturl(self) -> str:
+        return self._url
+
+
+# =============================================================================
+# HARNESS
+# =============================================================================
+
+def _load_agent():
+    """Import the entry point, pipeline and dispatcher modules."""
+    import run_discovery
+    from agent import pipeline
+    from agent.discovery import dispatcher
+
+    return run_discovery, pipeline, dispatcher
+
+
+@contextlib.contextmanager
+def _patched(*patches: Tuple[object, str, object]):
+    """Set (module, attribute, value) patches for the block, then restore them."""
+    saved = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+    try:
+        for obj, name, value in patches:
+            setattr(obj, name, value)
+        yield
+    finally:
+        for obj, name, value in reversed(saved):
+            setattr(obj, name, value)
+
+
+def _fresh_storage(verticals: List[str], topics_per_vertical: int, seed: int) -> CountingStorage:
+    """Empty in-memory store with seeded topics, installed as the backend."""
+    from agent import db
+    from agent.catalog import topic_catalog
+    from agent.metrics import metrics
+    from agent.sqlite_storage import SQLiteStorage
+    from agent.storage import set_storage
+    from agent.topic_index import topic_index
+
+    storage = CountingStorage(SQLiteStorage(":memory:"))
+    set_storage(storage)
+    db._seen_sources.clear()
+    topic_catalog.invalidate()
+    topic_index.clear()
+
+    rng = random.Random(seed)
+    for vertical in verticals:
+        for i in range(topics_per_vertical):
+            name = " ".join(rng.sample(_WORDS, 2)).title()
+            db.create_topic(f"{vertical}-{i}", name, vertical)
+
+    storage.calls.clear()
+    metrics.reset()
+    return storage
+
+
+def _timed(fn: Callable, latencies: List[float]) -> Callable:
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _result(mode: str, items: int, workers: int, elapsed: float, latencies: List[float],
+            model: FakeChatModel, storage: CountingStorage, outcomes: Counter) -> Dict:
+    articles = len(latencies)
+    per_article = max(articles, 1)
+    return {
+        "mode": mode,
+        "items": items,
+        "workers": workers,
+        "articles": articles,
+        "elapsed_s": round(elapsed, 4),
+        "articles_per_s": round(articles / elapsed, 2) if elapsed else None,
+        "latency_p50_s": round(_percentile(latencies, 0.5), 4),
+        "latency_p95_s": round(_percentile(latencies, 0.95), 4),
+        "llm_calls_per_article": round(model.calls / per_article, 3),
+        "prompt_tokens_per_article": round(model.prompt_tokens / per_article, 1),
+        "db_round_trips_per_article": round(sum(storage.calls.values()) / per_article, 3),
+        "db_calls": dict(storage.calls),
+        "outcomes": dict(outcomes),
+    }
+
+
+def run_discovery_case(modules, model: FakeChatModel, templates, items: int, workers: int,
+                       topics: int, feeds_per_vertical: int, seed: int) -> Dict:
+    """run_discovery over generated fixture feeds."""
+    run_discovery, _, dispatcher = modules
+    from agent.discovery import dedup
+    from agent.discovery.sources import feed_cache, rss
+
+    feed_map, bodies = build_feeds(build_items(templates, items, seed), feeds_per_vertical)
+    storage = _fresh_storage(list(feed_map), topics, seed)
+    model.reset()
+
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    ingest = dispatcher.run_article_ingestion
+
+    def counted_ingest(*args, **kwargs):
+        outcome = ingest(*args, **kwargs)
+        outcomes[outcome.value] += 1
+        return outcome
+
+    with tempfile.TemporaryDirectory() as cache_dir, _patched(
+        (feed_cache, "FEED_CACHE_DIR", cache_dir),
+        (dedup, "FEED_CACHE_DIR", cache_dir),
+        (rss, "_download_feed", lambda feed_url, validators: _FixtureResponse(bodies[feed_url], feed_url)),
+        (run_discovery, "FEED_MAP", feed_map),
+        (dispatcher, "DISPATCH_WORKERS", workers),
+        (dispatcher, "run_article_ingestion", _timed(counted_ingest, latencies)),
+    ):
+        start = time.perf_counter()
+        run_discovery.run_discovery()
+        elapsed = time.perf_counter() - start
+
+    return _result("discovery", items, workers, elapsed, latencies, model, storage, outcomes)
+
+
+def run_ingestion_case(modules, model: FakeChatModel, templates, items: int, workers: int,
+                       topics: int, seed: int) -> Dict:
+    """run_article_ingestion on a thread pool, without discovery or dedup."""
+    _, pipeline, _ = modules
+    batch = build_items(templates, items, seed)
+    storage = _fresh_storage(sorted({item["vertical"] for item in batch}), topics, seed)
+    model.reset()
+
+    latencies: List[float] = []
+    ingest = _timed(pipeline.run_article_ingestion, latencies)
+
+    def run(item):
+        return ingest(article_text=item["text"], vertical=item["vertical"], source_link=item["source_link"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run, batch))
+    elapsed = time.perf_counter() - start
+
+    outcomes = Counter(outcome.value for outcome in results)
+    return _result("ingestion", items, workers, elapsed, latencies, model, storage, outcomes)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=_int_list, default=[30, 120], help="comma-separated item counts")
+    parser.add_argument("--workers", type=_int_list, default=[1, 4], help="comma-separated worker counts")
+    parser.add_argument("--mode", choices=["both", "discovery", "ingestion"], default="both")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LLM seconds per call")
+    parser.add_argument("--match-rate", type=float, default=0.7, help="share of routing answers naming a topic")
+    parser.add_argument("--topics", type=int, default=20, help="seeded topics per vertical")
+    parser.add_argument("--feeds-per-vertical", type=int, default=2)
+    parser.add_argument("--memory-mode", choices=["two_step", "fused"], help="override MEMORY_UPDATE_MODE")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from agent import config
+
+    model = FakeChatModel(latency=args.latency, match_rate=args.match_rate, seed=args.seed)
+    modules = _load_agent()
+    _, pipeline, dispatcher = modules
+    templates = load_templates()
+
+    results = []
+    config.model.override(model)
+    try:
+        # The pipeline logs with print(); keep stdout for the report
+        with contextlib.redirect_stdout(sys.stderr), _patched(
+            (pipeline, "send_proposal_notification", lambda proposal, pending_id: None),
+            (pipeline, "MEMORY_UPDATE_MODE", args.memory_mode or pipeline.MEMORY_UPDATE_MODE),
+        ):
+            settings = {
+                "llm_latency_s": args.latency,
+                "match_rate": args.match_rate,
+                "topics_per_vertical": args.topics,
+                "feeds_per_vertical": args.feeds_per_vertical,
+                "routing_batch_size": dispatcher.ROUTING_BATCH_SIZE,
+                "memory_update_mode": pipeline.MEMORY_UPDATE_MODE,
+                "seed": args.seed,
+            }
+            for items in args.items:
+                for workers in args.workers:
+                    if args.mode in ("both", "discovery"):
+                        results.append(run_discovery_case(
+                            modules, model, templates, items, workers,
+                            args.topics, args.feeds_per_vertical, args.seed,
+                        ))
+                    if args.mode in ("both", "ingestion"):
+                        results.append(run_ingestion_case(
+                            modules, model, templates, items, workers, args.topics, args.seed,
+                        ))
+    finally:
+        config.model.reset()
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "settings": settings,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: section matcher throughput.
+Scores a dump of article texts and reports documents/s and MB/s as JSON.
+
+Usage:
+    python -m benchmarks.section_matcher [--dump FILE] [--docs N]
+
+FILE is a text file with one article per line, or JSONL with a "text" or
+"summary" field (e.g. an arXiv listing export). Without it, N synthetic
+abstracts are generated.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import List
+
+from agent.memory import SECTION_PHRASES, SectionMatcher
+
+
+_FILLER = (
+    "transformer attention benchmark dataset token latency memory training inference "
+    "evaluation accuracy robust sample baseline gradient layer retrieval context"
+).split()
+
+
+def synthetic_abstracts(count: int, seed: int = 7) -> List[str]:
+    """arXiv-sized abstracts (~150 words) with a few section cues sprinkled in."""
+    rng = random.Random(seed)
+    phrases = [p for table in SECTION_PHRASES.values() for p in table]
+    docs = []
+    for _ in range(count):
+        words = rng.choices(_FILLER, k=150)
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words)), rng.choice(phrases))
+        docs.append(" ".join(words))
+    return docs
+
+
+def load_dump(path: str) -> List[str]:
+    docs = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                row = json.loads(line)
+                line = row.get("text") or row.get("summary") or ""
+            docs.append(line)
+    return docs
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dump", help="one article per line, or JSONL")
+    parser.add_argument("--docs", type=int, default=20000, help="synthetic documents if no dump")
+    args = parser.parse_args(argv)
+
+    docs = load_dump(args.dump) if args.dump else synthetic_abstracts(args.docs)
+    megabytes = sum(len(d) for d in docs) / 1e6
+    matcher = SectionMatcher()
+
+    start = time.perf_counter()
+    candidates = [matcher.candidates(d) for d in docs]
+    seconds = time.perf_counter() - start
+
+    report = {
+        "documents": len(docs),
+        "megabytes": round(megabytes, 3),
+        "with_candidates": sum(1 for c in candidates if c),
+        "seconds": seconds,
+        "docs_per_s": len(docs) / seconds,
+        "mb_per_s": megabytes / seconds,
+    }
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
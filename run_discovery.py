@@ -4,8 +4,12 @@ Fetches RSS feeds and dispatches items to the processing pipeline.
 Run this as a scheduled job (cron, GitHub Actions, etc.)
 """
 from agent.discovery.sources.feeds import FEED_MAP
-from agent.discovery.sources.rss import fetch_rss_by_vertical
-from agent.discovery.dispatcher import dispatch_items
+from agent.discovery.sources.rss import iter_rss_by_vertical
+from agent.discovery.sources.feed_cache import FeedValidatorStore, FeedWatermarkStore
+from agent.discovery.dedup import NearDuplicateIndex
+from agent.discovery.dispatcher import dispatch_stream
+from agent.metrics import metrics
+from agent.pipeline import flush_notifications
 
 
 def run_discovery(verticals: list[str] | None = None):
@@ -23,10 +27,38 @@ def run_discovery(verticals: list[str] | None = None):
 
     print(f"[DISCOVERY] Fetching feeds for: {list(feed_map.keys())}")
 
-    items = fetch_rss_by_vertical(feed_map)
-    print(f"[DISCOVERY] Found {len(items)} items across all feeds")
+    with metrics.profile(), metrics.span("discovery.total"):
+        validator_store = FeedValidatorStore()
+        watermark_store = FeedWatermarkStore()
+        dedup_index = NearDuplicateIndex()
 
-    dispatch_items(items)
+        # Items stream from the fetchers through near-duplicate collapse into
+        # the dispatcher, so ingestion starts as soon as the first feed arrives
+        items = iter_rss_by_vertical(
+            feed_map,
+            validator_store=validator_store,
+            watermark_store=watermark_store,
+        )
+        items = dedup_index.iter_unique(items)
+
+        outcomes = dispatch_stream(items)
+        print(f"[DISCOVERY] Dispatched {len(outcomes)} items")
+
+        # Only remember feed validators, watermarks and signatures once items
+        # have been dispatched. Failed items are left out of all three, so
+        # their feed is fetched again and they are re-emitted next run.
+        failed_links = {link for link, outcome in outcomes.items() if outcome is None}
+        with metrics.span("discovery.commit"):
+            validator_store.commit(failed_links)
+            watermark_store.commit(failed_links)
+            dedup_index.commit(failed_links)
+
+        # Proposals are already logged as pending; this only waits for the
+        # background notifier to finish sending them
+        with metrics.span("discovery.notify_flush"):
+            flush_notifications()
+
+    metrics.write_reports()
     print("[DISCOVERY] Complete")
 
 